@@ -4,15 +4,195 @@ A/B Testing Framework for Canary Protocol Prompts
 Compare different prompt approaches and measure effectiveness
 """
 
-from openai import OpenAI
+from openai import (
+    AsyncOpenAI, DefaultAsyncHttpxClient,
+    RateLimitError, APIConnectionError, InternalServerError)
+import asyncio
+import functools
+import gzip
+import hashlib
 import json
+import random
+import re
+import sqlite3
 import time
+from collections import Counter
 from datetime import datetime
+from pathlib import Path
 import os
+import sys
+import numpy as np
 from dotenv import load_dotenv
 
-load_dotenv('config/.env')
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+try:
+    from classes.config_loader import get_setting
+except ImportError:
+    # Fallback for when running from different directory
+    sys.path.append(os.path.join(os.path.dirname(__file__), 'classes'))
+    from config_loader import get_setting
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+@functools.lru_cache(maxsize=1)
+def get_client():
+    """Create the shared AsyncOpenAI client on first use
+
+    All requests share one keep-alive httpx pool (HTTP/2 when ``h2`` is
+    installed) so a sweep pays the TLS handshake once, not per call.
+    """
+    import httpx
+
+    load_dotenv('config/.env')
+    http_client = DefaultAsyncHttpxClient(
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=64, max_keepalive_connections=64, keepalive_expiry=30),
+        timeout=httpx.Timeout(120.0, connect=5.0))
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client)
+
+
+async def close_client():
+    """Close the shared client's connection pool if it was created"""
+    if get_client.cache_info().currsize:
+        await get_client().close()
+        get_client.cache_clear()
+
+
+MODEL_NAME = "gpt-4o"
+MODEL_CONTEXT_TOKENS = 128000
+
+
+@functools.lru_cache(maxsize=1)
+def _get_encoding():
+    """Load the model's tokenizer once, if tiktoken is available"""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(MODEL_NAME)
+    except Exception:
+        return None
+
+
+def count_tokens(text):
+    """Count prompt tokens (falls back to ~4 characters per token)"""
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text) // 4
+    return len(encoding.encode(text))
+
+
+# Transient failures worth retrying (APITimeoutError subclasses APIConnectionError)
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+RETRY_MAX_DELAY = 60.0
+
+
+def _retry_after_seconds(error):
+    """Server-requested wait from a failed response's Retry-After headers"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return 0.0
+
+# Response evaluation patterns, compiled once at import
+REQUIRED_SECTIONS = (
+    "POLITICAL & INSTITUTIONAL",
+    "ECONOMIC STABILITY",
+    "SAFETY ASSESSMENT",
+    "TREND ANALYSIS",
+    "KEY TAKEAWAYS")
+PROBLEMATIC_TERMS = (
+    "collapse",
+    "chaos",
+    "catastrophic",
+    "civil war",
+    "apocalypse")
+STATUS_SYMBOLS = ("🟢", "🟠", "🔴")
+
+# Numeric evaluation fields aggregated per variant in generate_report
+METRIC_KEYS = ("score", "word_count", "sections_found", "link_count",
+               "numbers_found", "status_symbols")
+
+_NUMBER_RE = re.compile(r'\d+(?:\.\d+)?%|\$[\d,]+|\d+(?:,\d+)*')
+
+# One alternation covering every needle evaluate_response looks for, so a
+# response is scanned once and hits are bucketed by group name
+_EVAL_SCAN_RE = re.compile('|'.join([
+    '(?P<section>' + '|'.join(re.escape(section) for section in REQUIRED_SECTIONS) + ')',
+    '(?P<problematic>(?i:' + '|'.join(re.escape(term) for term in PROBLEMATIC_TERMS) + '))',
+    '(?P<symbol>[' + ''.join(STATUS_SYMBOLS) + '])',
+    r'(?P<link>\*\*\[|\]\()',
+    '(?P<number>' + _NUMBER_RE.pattern + ')',
+]))
+_PROBLEMATIC_RE = re.compile(
+    '|'.join(re.escape(term) for term in PROBLEMATIC_TERMS), re.IGNORECASE)
+
+# Structured-output mode: the briefing is returned as JSON matching this
+# schema, so sections, status symbols and sources are read off the object
+# instead of being scraped from markdown
+STRUCTURED_SECTIONS = {
+    "political_institutional": "POLITICAL & INSTITUTIONAL",
+    "economic_stability": "ECONOMIC STABILITY",
+    "safety_assessment": "SAFETY ASSESSMENT",
+    "trend_analysis": "TREND ANALYSIS"}
+_SECTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "status": {"type": "string", "enum": list(STATUS_SYMBOLS)},
+        "body": {"type": "string"}},
+    "required": ["status", "body"],
+    "additionalProperties": False}
+BRIEFING_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "canary_briefing",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                **{key: _SECTION_SCHEMA for key in STRUCTURED_SECTIONS},
+                "key_takeaways": {"type": "array", "items": {"type": "string"}},
+                "sources": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "title": {"type": "string"},
+                            "url": {"type": "string"}},
+                        "required": ["title", "url"],
+                        "additionalProperties": False}}},
+            "required": [*STRUCTURED_SECTIONS, "key_takeaways", "sources"],
+            "additionalProperties": False}}}
+
+# Streaming early-abort: check the newly streamed text every N chunks (~tokens)
+STREAM_CHECK_INTERVAL = 500
+EARLY_ABORT_WORD_LIMIT = 1500
+
+# Completions per variant/test pair in the default comprehensive run; --full
+# and --batch draw a single completion unless --iterations is given
+DEFAULT_ITERATIONS = 5
+# Characters carried between checks so a term split across them still matches
+_PROBLEMATIC_OVERLAP = max(len(term) for term in PROBLEMATIC_TERMS) - 1
 
 
 class PromptVariant:
@@ -24,13 +204,178 @@ class PromptVariant:
         self.results = []
 
 
+_RESET_PART_RE = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_RESET_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def _parse_reset_duration(value):
+    """Parse an x-ratelimit-reset-* value such as "1s", "6m0s" or "20ms" """
+    return sum(float(amount) * _RESET_UNITS[unit]
+               for amount, unit in _RESET_PART_RE.findall(value))
+
+
+class AsyncRateLimiter:
+    """Preemptive request + token bucket limiter for OpenAI calls"""
+
+    def __init__(self, requests_per_minute=500, tokens_per_minute=30000):
+        self._interval = 60.0 / requests_per_minute
+        self._next_slot = 0.0
+        self.tokens_per_minute = tokens_per_minute
+        self._tokens = float(tokens_per_minute)
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        """Top up the token bucket for the time elapsed since the last check"""
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._tokens = min(
+            self.tokens_per_minute,
+            self._tokens + elapsed * self.tokens_per_minute / 60.0)
+        self._last_refill = now
+
+    async def wait(self, estimated_tokens=0):
+        """Block until a request slot and enough token budget are available"""
+        estimated_tokens = min(estimated_tokens, self.tokens_per_minute)
+
+        async with self._lock:
+            while True:
+                self._refill()
+                delay = self._next_slot - time.monotonic()
+                if self._tokens < estimated_tokens:
+                    token_delay = (estimated_tokens - self._tokens) * 60.0 / self.tokens_per_minute
+                    delay = max(delay, token_delay)
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+
+            self._tokens -= estimated_tokens
+            self._next_slot = time.monotonic() + self._interval
+
+    def update_from_headers(self, headers):
+        """Sync the buckets with the server's x-ratelimit-* response headers"""
+        try:
+            limit_requests = headers.get("x-ratelimit-limit-requests")
+            if limit_requests and int(limit_requests) > 0:
+                self._interval = 60.0 / int(limit_requests)
+
+            limit_tokens = headers.get("x-ratelimit-limit-tokens")
+            if limit_tokens and int(limit_tokens) > 0:
+                self.tokens_per_minute = int(limit_tokens)
+
+            self._refill()
+            remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+            if remaining_tokens is not None:
+                self._tokens = min(self._tokens, float(remaining_tokens))
+
+            # Out of requests for this window: hold the next slot until reset
+            remaining_requests = headers.get("x-ratelimit-remaining-requests")
+            reset_requests = headers.get("x-ratelimit-reset-requests")
+            if remaining_requests == "0" and reset_requests:
+                self._next_slot = max(
+                    self._next_slot,
+                    time.monotonic() + _parse_reset_duration(reset_requests))
+        except (TypeError, ValueError):
+            pass
+
+    def record_usage(self, estimated_tokens, actual_tokens):
+        """Correct the bucket once the real token usage is known"""
+        self._refill()
+        self._tokens = min(
+            self.tokens_per_minute,
+            self._tokens + estimated_tokens - actual_tokens)
+
+
+class ResponseCache:
+    """Persistent cache of chat completions keyed on the full request"""
+
+    # Above this temperature completions vary enough that replaying one
+    # would misrepresent the variant, so those requests always hit the API
+    MAX_TEMPERATURE = 0.5
+
+    def __init__(self, db_path="data/ab_test_cache.db"):
+        self.db_path = db_path
+        self._memory = {}
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS response_cache (
+                request_hash TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                tokens_used INTEGER,
+                created_at TEXT
+            )
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(request_body):
+        """Hash model, messages and sampling parameters into a cache key"""
+        payload = json.dumps(request_body, sort_keys=True).encode("utf-8")
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    def get(self, key):
+        """Return (response, tokens_used) for a cached request, or None"""
+        if key in self._memory:
+            return self._memory[key]
+
+        row = self._conn.execute(
+            "SELECT response, tokens_used FROM response_cache WHERE request_hash = ?",
+            (key,)).fetchone()
+        if row:
+            self._memory[key] = row
+        return row
+
+    def set(self, key, response, tokens_used):
+        """Store a completed response"""
+        self._memory[key] = (response, tokens_used)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?, ?)",
+            (key, response, tokens_used, datetime.now().isoformat()))
+        self._conn.commit()
+
+
 class ABTestRunner:
-    def __init__(self):
+    def __init__(self, max_concurrent=8, requests_per_minute=500, tokens_per_minute=30000,
+                 max_retries=6, retry_base_delay=1.0, cache=None, artifact_dir=None,
+                 early_abort=False, structured=False, verbose=False):
         self.variants = {}
+        # Insertion-ordered variants for the sweep loops; self.variants
+        # serves the by-name lookups in run_test
+        self._variant_order = []
         self.test_data = []
+        self._prompt_cache = {}
+        # Cap in-flight API calls so a full sweep doesn't burst past the
+        # account's rate limits; tune to roughly RPM / 60 * avg latency
+        self.max_concurrent = max_concurrent
+        self._sem = asyncio.Semaphore(max_concurrent)
+        self.rate_limiter = AsyncRateLimiter(requests_per_minute, tokens_per_minute)
+        # Total attempts per completion, so at least one is always made
+        if max_retries < 1:
+            raise ValueError(f"max_retries must be at least 1, got {max_retries}")
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        # Optional ResponseCache; off by default since repeated iterations
+        # of the same prompt are meant to sample fresh completions
+        self.cache = cache
+        # When set, response bodies are gzipped to disk after scoring and
+        # only their hash is kept in memory
+        self.artifact_dir = artifact_dir
+        # Stream single-sample completions and stop once a response is
+        # clearly failing (far over length or alarmist wording)
+        self.early_abort = early_abort
+        # Request JSON briefings (BRIEFING_RESPONSE_FORMAT) and score them
+        # from the parsed object rather than by scanning markdown
+        self.structured = structured
+        self.verbose = verbose
 
     def add_variant(self, variant):
         """Add a prompt variant to test"""
+        existing = self.variants.get(variant.name)
+        if existing is not None:
+            self._variant_order[self._variant_order.index(existing)] = variant
+        else:
+            self._variant_order.append(variant)
         self.variants[variant.name] = variant
 
     def add_test_case(
@@ -47,32 +392,180 @@ class ABTestRunner:
             "expected": expected_characteristics or {}
         })
 
-    def run_test(self, variant_name, test_case, user_prompt):
-        """Run a single test with one variant"""
+    def _build_request_body(self, variant, user_prompt, samples=1):
+        """Build chat completion parameters for one variant/prompt pair"""
+        body = {
+            "model": MODEL_NAME,
+            "messages": [
+                {"role": "system", "content": variant.system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            "temperature": variant.temperature,
+            "max_tokens": variant.max_tokens,
+            # Routes every request of a variant to the same server-side
+            # prompt cache; the static system prompt leads and the per-test
+            # urgency and headlines stay at the tail so the prefix is shared
+            "prompt_cache_key": f"canary-ab-{variant.name}"
+        }
+        if samples > 1:
+            body["n"] = samples
+        if self.structured:
+            body["response_format"] = BRIEFING_RESPONSE_FORMAT
+        return body
+
+    async def _raw_create(self, **kwargs):
+        """Create a chat completion and feed its rate-limit headers to the limiter"""
+        # Retries are handled by _create_completion, so the SDK's own retry
+        # loop is disabled here (and only here) to keep backoff from compounding
+        client = get_client().with_options(max_retries=0)
+        raw = await client.chat.completions.with_raw_response.create(**kwargs)
+        self.rate_limiter.update_from_headers(raw.headers)
+        return raw.parse()
+
+    async def _stream_completion(self, request_body):
+        """Stream one completion, aborting early if it is clearly failing"""
+        stream = await self._raw_create(
+            **request_body, stream=True, stream_options={"include_usage": True})
+
+        parts = []
+        tokens_used = None
+        early_abort = False
+        chunk_count = 0
+        # Running state so each check only looks at text streamed since the last
+        checked_parts = 0
+        word_count = 0
+        tail = ""
+
+        async for chunk in stream:
+            if chunk.usage:
+                tokens_used = chunk.usage.total_tokens
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+
+            chunk_count += 1
+            if chunk_count % STREAM_CHECK_INTERVAL == 0:
+                new_text = "".join(parts[checked_parts:])
+                checked_parts = len(parts)
+                if not new_text:
+                    continue
+
+                word_count += len(new_text.split())
+                if tail and not tail[-1].isspace() and not new_text[0].isspace():
+                    word_count -= 1  # Word straddling the previous check was already counted
+
+                window = tail + new_text
+                tail = window[-_PROBLEMATIC_OVERLAP:]
+                if word_count > EARLY_ABORT_WORD_LIMIT or _PROBLEMATIC_RE.search(window):
+                    early_abort = True
+                    await stream.close()
+                    break
+
+        return "".join(parts), tokens_used, early_abort
+
+    async def _create_completion(self, variant, user_prompt, estimated_tokens, samples=1):
+        """Call the chat API, retrying transient failures with backoff + jitter
+
+        Returns a dict with the choice texts ("contents"), "tokens_used",
+        "response_time" and whether the stream was cut short ("early_abort").
+        """
+        request_body = self._build_request_body(variant, user_prompt, samples)
+
+        for attempt in range(self.max_retries):
+            try:
+                await self.rate_limiter.wait(estimated_tokens)
+
+                async with self._sem:
+                    # Timed from here so the latency excludes the wait for a slot
+                    start_time = time.perf_counter()
+                    if self.early_abort and samples == 1:
+                        text, tokens_used, early_abort = await self._stream_completion(
+                            request_body)
+                        contents = [text]
+                        if tokens_used is None:
+                            # Aborted streams never receive the usage chunk
+                            tokens_used = estimated_tokens - variant.max_tokens + count_tokens(text)
+                    else:
+                        response = await self._raw_create(**request_body)
+                        contents = [choice.message.content for choice in response.choices]
+                        tokens_used = response.usage.total_tokens
+                        early_abort = False
+
+                return {
+                    "contents": contents,
+                    "tokens_used": tokens_used,
+                    "response_time": time.perf_counter() - start_time,
+                    "early_abort": early_abort
+                }
+
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries - 1:
+                    raise
+
+                # Jittered exponential backoff, never shorter than Retry-After
+                delay = min(RETRY_MAX_DELAY,
+                            self.retry_base_delay * (2 ** attempt + random.random()))
+                delay = max(delay, _retry_after_seconds(e))
+                if self.verbose:
+                    print(f"  ⚠️ {variant.name}: {type(e).__name__}, retrying in {delay:.1f}s "
+                          f"(attempt {attempt + 1}/{self.max_retries})", file=sys.stderr)
+                await asyncio.sleep(delay)
+
+    async def run_test(self, variant_name, test_case, user_prompt, samples=1):
+        """Run a single test with one variant
+
+        With samples > 1 the completions are drawn in one request via the
+        API's ``n`` parameter and returned together under "responses".
+        """
         variant = self.variants[variant_name]
 
-        try:
-            start_time = time.time()
-
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": variant.system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=variant.temperature,
-                max_tokens=variant.max_tokens
-            )
+        # Pre-dispatch estimate, corrected from response usage afterwards
+        prompt_tokens = count_tokens(variant.system_prompt) + count_tokens(user_prompt)
+        if prompt_tokens + variant.max_tokens > MODEL_CONTEXT_TOKENS:
+            return {
+                "error": f"Prompt too large: {prompt_tokens} tokens + {variant.max_tokens} "
+                         f"completion exceeds {MODEL_CONTEXT_TOKENS} context",
+                "variant": variant_name
+            }
+        estimated_tokens = variant.max_tokens * samples + prompt_tokens
+
+        cache_key = None
+        if (self.cache is not None and samples == 1
+                and variant.temperature <= ResponseCache.MAX_TEMPERATURE):
+            cache_key = ResponseCache.make_key(
+                self._build_request_body(variant, user_prompt))
+            cached = self.cache.get(cache_key)
+            if cached:
+                result = {
+                    "response": cached[0],
+                    "response_time": 0.0,
+                    "tokens_used": cached[1],
+                    "test_case": test_case,
+                    "timestamp_ns": time.time_ns(),
+                    "cached": True
+                }
+                variant.results.append(result)
+                return result
 
-            end_time = time.time()
+        try:
+            completion = await self._create_completion(
+                variant, user_prompt, estimated_tokens, samples)
+            self.rate_limiter.record_usage(
+                estimated_tokens, completion["tokens_used"])
 
             result = {
-                "response": response.choices[0].message.content,
-                "response_time": end_time - start_time,
-                "tokens_used": response.usage.total_tokens,
+                "response": completion["contents"][0],
+                "response_time": completion["response_time"],
+                "tokens_used": completion["tokens_used"],
                 "test_case": test_case,
-                "timestamp": datetime.now().isoformat()
+                "timestamp_ns": time.time_ns()
             }
+            if samples > 1:
+                result["responses"] = completion["contents"]
+            if completion["early_abort"]:
+                result["early_abort"] = True
+
+            if cache_key is not None and not completion["early_abort"]:
+                self.cache.set(cache_key, result["response"], result["tokens_used"])
 
             variant.results.append(result)
             return result
@@ -82,11 +575,78 @@ class ABTestRunner:
 
     def evaluate_response(self, response_text, expected_characteristics):
         """Evaluate response quality based on criteria"""
+        if self.structured:
+            evaluation = self._evaluate_structured(response_text)
+            if evaluation is not None:
+                return evaluation
+
+        word_count = len(response_text.split())
+
+        # Single scan for sections, links, numbers, symbols and tone
+        sections_seen = set()
+        problematic_terms = Counter()
+        link_count = numbers = status_symbols = 0
+        for match in _EVAL_SCAN_RE.finditer(response_text):
+            kind = match.lastgroup
+            if kind == "number":
+                numbers += 1
+            elif kind == "link":
+                link_count += 1
+            elif kind == "symbol":
+                status_symbols += 1
+            elif kind == "section":
+                sections_seen.add(match.group())
+            else:
+                problematic_terms[match.group().lower()] += 1
+
+        return self._score_metrics(
+            word_count, len(sections_seen),
+            link_count // 2,  # Divide by 2 since each link has 2 parts
+            numbers, status_symbols, problematic_terms)
+
+    def _evaluate_structured(self, response_text):
+        """Evaluate a JSON briefing, or return None if it does not parse"""
+        try:
+            briefing = orjson.loads(response_text) if orjson is not None else json.loads(response_text)
+        except ValueError:
+            return None
+        if not isinstance(briefing, dict):
+            return None
+
+        prose = []
+        sections_found = status_symbols = 0
+        for key in STRUCTURED_SECTIONS:
+            section = briefing.get(key) or {}
+            if section.get("body"):
+                sections_found += 1
+                prose.append(section["body"])
+            if section.get("status") in STATUS_SYMBOLS:
+                status_symbols += 1
+
+        takeaways = [t for t in briefing.get("key_takeaways") or [] if t]
+        if takeaways:
+            sections_found += 1
+            prose.extend(takeaways)
+
+        text = "\n".join(prose)
+        link_count = sum(1 for source in briefing.get("sources") or [] if source.get("url"))
+        problematic_terms = Counter(m.group().lower() for m in _PROBLEMATIC_RE.finditer(text))
+
+        return self._score_metrics(
+            len(text.split()), sections_found, link_count,
+            len(_NUMBER_RE.findall(text)), status_symbols, problematic_terms)
+
+    def _score_metrics(self, word_count, sections_found, link_count,
+                       numbers, status_symbols, problematic_terms):
+        """Turn raw response metrics into a score and feedback
+
+        ``problematic_terms`` maps each flagged term to its occurrence count;
+        the tone penalty is per distinct term.
+        """
         score = 0
         feedback = []
 
         # Word count compliance
-        word_count = len(response_text.split())
         if 800 <= word_count <= 1200:  # Target range
             score += 20
             feedback.append("✅ Appropriate length")
@@ -95,34 +655,18 @@ class ABTestRunner:
                 f"⚠️ Length: {word_count} words (target: 800-1200)")
 
         # Section structure
-        required_sections = [
-            "POLITICAL & INSTITUTIONAL",
-            "ECONOMIC STABILITY",
-            "SAFETY ASSESSMENT",
-            "TREND ANALYSIS",
-            "KEY TAKEAWAYS"
-        ]
-
-        sections_found = sum(
-            1 for section in required_sections if section in response_text)
-        score += (sections_found / len(required_sections)) * 20
+        score += (sections_found / len(REQUIRED_SECTIONS)) * 20
         feedback.append(
-            f"📋 Sections: {sections_found}/{len(required_sections)}")
+            f"📋 Sections: {sections_found}/{len(REQUIRED_SECTIONS)}")
 
         # Link formatting
-        link_count = response_text.count("**[") + response_text.count("](")
-        if link_count >= 4:  # At least 2 proper markdown links
+        if link_count >= 2:
             score += 15
             feedback.append("✅ Good source linking")
         else:
             feedback.append("⚠️ Insufficient source links")
 
         # Specific metrics/numbers
-        import re
-        numbers = len(
-            re.findall(
-                r'\d+(?:\.\d+)?%|\$[\d,]+|\d+(?:,\d+)*',
-                response_text))
         if numbers >= 5:
             score += 15
             feedback.append("✅ Good quantitative detail")
@@ -130,8 +674,6 @@ class ABTestRunner:
             feedback.append("⚠️ Needs more specific metrics")
 
         # Safety status symbols
-        status_symbols = response_text.count(
-            "🟢") + response_text.count("🟠") + response_text.count("🔴")
         if status_symbols >= 4:  # One for each group
             score += 15
             feedback.append("✅ Safety assessments complete")
@@ -139,14 +681,7 @@ class ABTestRunner:
             feedback.append("⚠️ Missing safety status indicators")
 
         # Avoid problematic language
-        problematic_terms = [
-            "collapse",
-            "chaos",
-            "catastrophic",
-            "civil war",
-            "apocalypse"]
-        problematic_found = sum(
-            1 for term in problematic_terms if term.lower() in response_text.lower())
+        problematic_found = len(problematic_terms)
         if problematic_found == 0:
             score += 15
             feedback.append("✅ Professional tone maintained")
@@ -159,56 +694,225 @@ class ABTestRunner:
             "feedback": feedback,
             "word_count": word_count,
             "sections_found": sections_found,
-            "link_count": link_count // 2,  # Divide by 2 since each link has 2 parts
+            "link_count": link_count,
             "numbers_found": numbers,
-            "status_symbols": status_symbols
+            "status_symbols": status_symbols,
+            "problematic_terms": dict(problematic_terms)
         }
 
-    def run_full_test(self):
-        """Run all variants against all test cases"""
+    def _build_user_prompt(self, test_idx):
+        """Build (once) the user prompt for a test case
+
+        Trailing headlines are dropped if the prompt would not fit in the
+        model context alongside the largest variant's system prompt and
+        completion budget.
+        """
+        if test_idx in self._prompt_cache:
+            return self._prompt_cache[test_idx]
+
+        test_case = self.test_data[test_idx]
+        headline_lines = [f"{h['title']} - {h['url']}" for h in test_case["headlines"]]
+
+        economic_context = ""
+        high_concern = [
+            e for e in test_case["economic_data"] or [] if e.get('concern_level') == 'high']
+        if high_concern:
+            concerns = ", ".join(f"{e['indicator']}: {e['status']}" for e in high_concern)
+            economic_context = f"\n\nEconomic concerns: {concerns}"
+
+        prefix = f"Current urgency level: {test_case['urgency_level']}\nEconomic context: {economic_context}\n\nHeadlines to analyze:\n"
+        user_prompt = prefix + "\n".join(headline_lines)
+
+        reserved = max(
+            (count_tokens(v.system_prompt) + v.max_tokens for v in self._variant_order),
+            default=0)
+        budget = MODEL_CONTEXT_TOKENS - reserved
+        prompt_tokens = count_tokens(user_prompt)
+        if prompt_tokens > budget:
+            dropped = 0
+            while headline_lines and prompt_tokens > budget:
+                prompt_tokens -= count_tokens(headline_lines.pop()) + 1
+                dropped += 1
+            user_prompt = prefix + "\n".join(headline_lines)
+            print(f"⚠️ Test case {test_idx + 1}: dropped {dropped} headlines to fit the context window")
+
+        self._prompt_cache[test_idx] = user_prompt
+        return user_prompt
+
+    def _build_jobs(self):
+        """Expand test cases × variants into (test_idx, variant, case, prompt) jobs"""
+        jobs = []
+
+        for test_idx, test_case in enumerate(self.test_data):
+            user_prompt = self._build_user_prompt(test_idx)
+            for variant in self._variant_order:
+                jobs.append((test_idx, variant.name, test_case, user_prompt))
+
+        return jobs
+
+    def _evaluate_result(self, result, test_case):
+        """Score a successful test's responses, archiving them if configured
+
+        Multi-sample results are scored choice by choice, so each of the n
+        completions counts as its own evaluation.
+        """
+        texts = result.get("responses") or [result["response"]]
+        evaluations = [
+            self.evaluate_response(text, test_case.get("expected", {}))
+            for text in texts]
+        if result.get("early_abort"):
+            # A truncated response scores low on length, sections and links;
+            # flag it so the report keeps it out of the quality averages
+            for evaluation in evaluations:
+                evaluation["early_abort"] = True
+        result["evaluation"] = evaluations[0]
+        if len(evaluations) > 1:
+            result["evaluations"] = evaluations
+        if self.artifact_dir:
+            self._archive_response(result)
+
+    def _record_result(self, results_summary, test_idx, variant_name, test_case, result):
+        """Add a finished test to the per-variant summary, scoring it if needed"""
+        print(f"Test Case {test_idx + 1}/{len(self.test_data)} - {variant_name}")
+
+        if "error" not in result:
+            if "evaluation" not in result:
+                self._evaluate_result(result, test_case)
+            evaluations = result.get("evaluations") or [result["evaluation"]]
+
+            if variant_name not in results_summary:
+                results_summary[variant_name] = []
+            results_summary[variant_name].extend(evaluations)
+
+            print(f"  Score: {', '.join(str(e['score']) for e in evaluations)}/100"
+                  + (" (aborted early)" if result.get("early_abort") else ""))
+        else:
+            print(f"  Error: {result['error']}")
+
+    def _archive_response(self, result):
+        """Move scored response bodies to gzipped artifacts referenced by hash"""
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        texts = result.pop("responses", None) or [result["response"]]
+        result.pop("response", None)
+
+        hashes = []
+        for response_text in texts:
+            response_hash = hashlib.blake2b(
+                response_text.encode("utf-8"), digest_size=16).hexdigest()
+            artifact_path = os.path.join(self.artifact_dir, f"{response_hash}.txt.gz")
+
+            if not os.path.exists(artifact_path):
+                with gzip.open(artifact_path, "wt", encoding="utf-8") as f:
+                    f.write(response_text)
+            hashes.append(response_hash)
+
+        result["response_hash"] = hashes[0]
+        if len(hashes) > 1:
+            result["response_hashes"] = hashes
+
+    async def run_full_test(self, samples=1):
+        """Run all variants against all test cases concurrently, scoring as results arrive
+
+        ``samples`` completions are drawn per variant/test pair in a single
+        request (the API's ``n`` parameter).
+        """
         print("🧪 STARTING A/B TEST")
         print("=" * 50)
 
         results_summary = {}
+        jobs = self._build_jobs()
+
+        print(f"Dispatching {len(jobs)} requests "
+              f"({len(self.variants)} variants × {len(self.test_data)} test cases, "
+              f"max {self.max_concurrent} in flight)")
+
+        async def run_job(job):
+            _, variant_name, test_case, user_prompt = job
+            result = await self.run_test(
+                variant_name, test_case, user_prompt, samples=samples)
+            if "error" not in result:
+                # Scoring and artifact writes run on a worker thread so the
+                # event loop keeps servicing the requests still in flight
+                await asyncio.to_thread(self._evaluate_result, result, test_case)
+            return job, result
+
+        # Record each response as soon as it lands
+        for next_done in asyncio.as_completed([run_job(job) for job in jobs]):
+            (test_idx, variant_name, test_case, _), result = await next_done
+            self._record_result(
+                results_summary, test_idx, variant_name, test_case, result)
 
-        for test_idx, test_case in enumerate(self.test_data):
-            print(f"\nTest Case {test_idx + 1}/{len(self.test_data)}")
-            print("-" * 30)
-
-            # Create user prompt for this test case
-            headlines_text = "\n".join(
-                [f"{h['title']} - {h['url']}" for h in test_case["headlines"]])
-            economic_context = ""
-            if test_case["economic_data"]:
-                high_concern = [
-                    e for e in test_case["economic_data"] if e.get('concern_level') == 'high']
-                if high_concern:
-                    economic_context = f"\n\nEconomic concerns: {', '.join([e['indicator'] + ': ' + e['status'] for e in high_concern])}"
-
-            user_prompt = f"""Current urgency level: {test_case['urgency_level']}
-Economic context: {economic_context}
-
-Headlines to analyze:
-{headlines_text}"""
-
-            for variant_name in self.variants:
-                print(f"Testing {variant_name}...")
-                result = self.run_test(variant_name, test_case, user_prompt)
-
-                if "error" not in result:
-                    evaluation = self.evaluate_response(
-                        result["response"], test_case.get("expected", {}))
-                    result["evaluation"] = evaluation
+        return self.generate_report(results_summary)
 
-                    if variant_name not in results_summary:
-                        results_summary[variant_name] = []
-                    results_summary[variant_name].append(evaluation)
+    async def run_full_test_batch(self, poll_interval=30, samples=1):
+        """Run the full sweep through the OpenAI Batch API (offline, half price)"""
+        print("🧪 STARTING A/B TEST (BATCH API)")
+        print("=" * 50)
 
-                    print(f"  Score: {evaluation['score']}/100")
-                else:
-                    print(f"  Error: {result['error']}")
+        results_summary = {}
+        jobs = {}
+        lines = []
+
+        for job_idx, job in enumerate(self._build_jobs()):
+            _, variant_name, _, user_prompt = job
+            custom_id = f"{variant_name}_{job_idx}"
+            jobs[custom_id] = job
+            lines.append(json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._build_request_body(
+                    self.variants[variant_name], user_prompt, samples)
+            }))
+
+        client = get_client()
+        batch_file = await client.files.create(
+            file=("ab_test_batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch")
+        batch = await client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h")
+        print(f"Submitted batch {batch.id} with {len(lines)} requests")
+
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(poll_interval)
+            batch = await client.batches.retrieve(batch.id)
+            print(f"  Batch status: {batch.status}")
+
+        if batch.status != "completed" or not batch.output_file_id:
+            print(f"❌ Batch {batch.id} ended with status: {batch.status}")
+            return self.generate_report(results_summary)
+
+        output = await client.files.content(batch.output_file_id)
+
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            test_idx, variant_name, test_case, _ = jobs[record["custom_id"]]
+            response = record.get("response") or {}
+            body = response.get("body") or {}
+
+            if record.get("error") or response.get("status_code") != 200:
+                error = record.get("error") or body.get("error") or "request failed"
+                result = {"error": str(error), "variant": variant_name}
+            else:
+                contents = [choice["message"]["content"] for choice in body["choices"]]
+                result = {
+                    "response": contents[0],
+                    "response_time": None,
+                    "tokens_used": body["usage"]["total_tokens"],
+                    "test_case": test_case,
+                    "timestamp_ns": time.time_ns(),
+                    "batch_id": batch.id
+                }
+                if samples > 1:
+                    result["responses"] = contents
+                self.variants[variant_name].results.append(result)
 
-                time.sleep(1)  # Rate limiting
+            self._record_result(
+                results_summary, test_idx, variant_name, test_case, result)
 
         return self.generate_report(results_summary)
 
@@ -218,43 +922,57 @@ Headlines to analyze:
         print("📊 A/B TEST RESULTS REPORT")
         print("=" * 60)
 
-        for variant_name, evaluations in results_summary.items():
+        mean_scores = {}
+        early_aborts = {}
+
+        for variant_name, all_evaluations in results_summary.items():
+            # Aborted streams were cut short, so only complete responses are averaged
+            evaluations = [e for e in all_evaluations if not e.get("early_abort")]
+            aborted = len(all_evaluations) - len(evaluations)
+            if aborted:
+                early_aborts[variant_name] = aborted
             if not evaluations:
+                if aborted:
+                    print(f"\n🔬 VARIANT: {variant_name}")
+                    print(f"Early aborts: {aborted} (no complete responses to score)")
                 continue
 
-            scores = [e["score"] for e in evaluations]
-            avg_score = sum(scores) / len(scores)
+            # One row per evaluation, one column per metric, reduced at once
+            metrics = np.array(
+                [[e[k] for k in METRIC_KEYS] for e in evaluations],
+                dtype=np.float64)
+            means = dict(zip(METRIC_KEYS, metrics.mean(axis=0)))
+            scores = metrics[:, 0]
+
+            # Common feedback, tallied on the leading status symbol
+            feedback_counts = Counter(
+                f[0] for e in evaluations for f in e["feedback"] if f)
+            positive_count = feedback_counts["✅"]
+            warning_count = feedback_counts["⚠"]
+
+            avg_score = float(means["score"])
+            mean_scores[variant_name] = avg_score
+            p50, p90 = np.percentile(scores, [50, 90])
 
             print(f"\n🔬 VARIANT: {variant_name}")
             print(f"Average Score: {avg_score:.1f}/100")
-            print(f"Score Range: {min(scores)}-{max(scores)}")
-
-            # Aggregate metrics
-            avg_word_count = sum(e["word_count"]
-                                 for e in evaluations) / len(evaluations)
-            avg_sections = sum(e["sections_found"]
-                               for e in evaluations) / len(evaluations)
-            avg_links = sum(e["link_count"]
-                            for e in evaluations) / len(evaluations)
-
-            print(f"Avg Word Count: {avg_word_count:.0f}")
-            print(f"Avg Sections: {avg_sections:.1f}/5")
-            print(f"Avg Links: {avg_links:.1f}")
-
-            # Common feedback
-            all_feedback = []
-            for evaluation in evaluations:
-                all_feedback.extend(evaluation["feedback"])
+            print(f"Score Range: {scores.min()}-{scores.max()}")
+            if len(evaluations) > 1:
+                print(f"Score p50/p90: {p50:.1f}/{p90:.1f}")
 
-            positive_feedback = [f for f in all_feedback if f.startswith("✅")]
-            warning_feedback = [f for f in all_feedback if f.startswith("⚠️")]
+            print(f"Avg Word Count: {means['word_count']:.0f}")
+            print(f"Avg Sections: {means['sections_found']:.1f}/5")
+            print(f"Avg Links: {means['link_count']:.1f}")
+            print(f"Avg Numbers: {means['numbers_found']:.1f}")
+            print(f"Avg Status Symbols: {means['status_symbols']:.1f}")
 
-            print(f"Positive: {len(positive_feedback)} | Warnings: {len(warning_feedback)}")
+            print(f"Positive: {positive_count} | Warnings: {warning_count}")
+            if aborted:
+                print(f"Early aborts: {aborted} (excluded from averages)")
 
         # Determine winner
-        if results_summary:
-            best_variant = max(results_summary.keys(), key=lambda v: sum(
-                e["score"] for e in results_summary[v]) / len(results_summary[v]))
+        if mean_scores:
+            best_variant = max(mean_scores, key=mean_scores.get)
             print(f"\n🏆 WINNING VARIANT: {best_variant}")
         else:
             best_variant = "No successful tests"
@@ -263,10 +981,33 @@ Headlines to analyze:
         return {
             "winner": best_variant,
             "results": results_summary,
+            "early_aborts": early_aborts,
             "timestamp": datetime.now().isoformat()
         }
 
 
+def save_report(report, path=None):
+    """Write an A/B test report to disk atomically and return its path"""
+    if path is None:
+        path = f"ab_test_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+
+    if orjson is not None:
+        payload = orjson.dumps(
+            report, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+    else:
+        payload = json.dumps(report, indent=2).encode("utf-8")
+
+    # Write beside the target and rename so an interrupted run never
+    # leaves a half-written report behind
+    report_path = Path(path)
+    tmp_path = report_path.with_suffix(".tmp")
+    tmp_path.write_bytes(payload)
+    tmp_path.replace(report_path)
+
+    print(f"💾 Report saved to {report_path}")
+    return str(report_path)
+
+
 def create_test_variants():
     """Create different prompt variants for testing"""
 
@@ -330,44 +1071,55 @@ def setup_test_data():
     ]
 
 
-if __name__ == "__main__":
-    import sys
+def _build_parser():
+    """Build the CLI argument parser"""
+    import argparse
 
-    print("🧪 CANARY PROTOCOL A/B TESTING")
-    print("=" * 50)
+    parser = argparse.ArgumentParser(description='Canary Protocol A/B Testing Framework')
+    parser.add_argument('--variant', help='Test specific variant')
+    parser.add_argument('--iterations', type=int,
+                        help='Completions per variant/test pair, drawn in one request with n '
+                             f'(default: 1 with --full/--batch, {DEFAULT_ITERATIONS} otherwise)')
+    parser.add_argument('--verbose', action='store_true', help='Verbose output')
+    parser.add_argument('--max-concurrent', type=int, default=get_setting('intelligence.ab_test_max_concurrent', 8),
+                        help='Maximum concurrent API requests')
+    parser.add_argument('--full', action='store_true', help='Run every variant against the sample test data and save a report')
+    parser.add_argument('--batch', action='store_true', help='Run the full test through the OpenAI Batch API')
+    parser.add_argument('--cache', action='store_true', help='Reuse cached responses for identical requests across runs')
+    parser.add_argument('--artifact-dir', help='Store gzipped response bodies here instead of in memory')
+    parser.add_argument('--early-abort', action='store_true', help='Stream responses and stop clearly failing ones early')
+    parser.add_argument('--structured', action='store_true', help='Request JSON briefings and score them without regex scanning')
+    return parser
 
-    if len(sys.argv) > 1:
-        choice = sys.argv[1]
-    else:
-        # Default to running comprehensive tests when called without arguments
-        choice = "1"
 
-    tester = ABTestRunner()
+def main():
+    """Main entry point for A/B testing"""
+    args = _build_parser().parse_args()
 
-    # Add variants
-    for variant in create_test_variants():
-        tester.add_variant(variant)
+    asyncio.run(main_async(args))
 
-    # Add test data
-    for test_case in setup_test_data():
-        tester.add_test_case(**test_case)
 
-def main():
-    """Main entry point for A/B testing"""
-    import argparse
-    
-    parser = argparse.ArgumentParser(description='Canary Protocol A/B Testing Framework')
-    parser.add_argument('--variant', help='Test specific variant')
-    parser.add_argument('--iterations', type=int, default=5, help='Number of test iterations')
-    parser.add_argument('--verbose', action='store_true', help='Verbose output')
-    
-    args = parser.parse_args()
-    
+async def main_async(args):
+    """Run the selected A/B test mode on one event loop"""
+    try:
+        await _run_cli(args)
+    finally:
+        await close_client()
+
+
+async def _run_cli(args):
+    """Dispatch CLI arguments to the matching A/B test mode"""
     print("🧪 CANARY PROTOCOL A/B TESTING")
     print("=" * 50)
     print()
     
-    runner = ABTestRunner()
+    runner = ABTestRunner(
+        max_concurrent=args.max_concurrent,
+        cache=ResponseCache() if args.cache else None,
+        artifact_dir=args.artifact_dir,
+        early_abort=args.early_abort,
+        structured=args.structured,
+        verbose=args.verbose)
     
     # Add variants from the existing function
     for variant in create_test_variants():
@@ -406,49 +1158,70 @@ def main():
         }
     ]
     
-    if args.variant:
+    if args.batch:
+        report = await runner.run_full_test_batch(samples=args.iterations or 1)
+        await asyncio.to_thread(save_report, report)
+    elif args.full:
+        report = await runner.run_full_test(samples=args.iterations or 1)
+        await asyncio.to_thread(save_report, report)
+    elif args.variant:
         print(f"Testing variant: {args.variant}")
         if sample_test_cases:
             test_case = sample_test_cases[0]
-            result = runner.run_test(args.variant, test_case, f"Test case: {test_case['name']}")
+            result = await runner.run_test(
+                args.variant, test_case, f"Test case: {test_case['name']}")
             print(f"Result: {result}")
     else:
+        iterations = args.iterations or DEFAULT_ITERATIONS
         print("🔬 Running comprehensive A/B tests...")
         print(f"Test cases: {len(sample_test_cases)}")
         print(f"Variants: {len(runner.variants)}")
-        print(f"Iterations per test: {args.iterations}")
+        print(f"Iterations per test: {iterations}")
         print()
         
         if sample_test_cases and runner.variants:
             # Run tests manually since run_comprehensive_test doesn't exist
             results = {}
-            for variant_name in runner.variants:
-                results[variant_name] = {
+            for variant in runner._variant_order:
+                results[variant.name] = {
                     'success_count': 0,
                     'total_tests': 0,
                     'response_times': [],
                     'errors': 0
                 }
             
+            jobs = []
             for test_case in sample_test_cases:
-                print(f"\nTesting: {test_case['name']}")
+                print(f"Queueing: {test_case['name']}")
                 user_prompt = f"Urgency level: {test_case['urgency_level']}\nHeadlines: {[h['title'] for h in test_case['headlines']]}"
                 
-                for variant_name in runner.variants:
-                    for i in range(args.iterations):
-                        try:
-                            result = runner.run_test(variant_name, test_case, user_prompt)
-                            results[variant_name]['total_tests'] += 1
-                            if "error" not in result:
-                                results[variant_name]['success_count'] += 1
-                        except Exception as e:
-                            results[variant_name]['errors'] += 1
+                for variant in runner._variant_order:
+                    jobs.append((variant.name, test_case, user_prompt))
+
+            # Draw every iteration of a variant/test pair in one request (n=iterations)
+            job_results = await asyncio.gather(
+                *(runner.run_test(v, tc, prompt, samples=iterations)
+                  for v, tc, prompt in jobs),
+                return_exceptions=True)
+
+            for (variant_name, _, _), result in zip(jobs, job_results):
+                if isinstance(result, BaseException):
+                    results[variant_name]['errors'] += iterations
+                    continue
+                results[variant_name]['total_tests'] += iterations
+                if "error" not in result:
+                    results[variant_name]['success_count'] += len(
+                        result.get("responses", [result["response"]]))
+                    results[variant_name]['response_times'].append(
+                        result["response_time"])
             
             # Calculate success rates
             for variant_name in results:
                 stats = results[variant_name]
                 stats['success_rate'] = stats['success_count'] / max(stats['total_tests'], 1)
-                stats['avg_response_time'] = 0.5  # Mock response time
+                response_times = stats['response_times']
+                stats['avg_response_time'] = (
+                    sum(response_times) / len(response_times) if response_times else 0.0)
             
             print("\n📊 A/B TEST RESULTS:")
             print("=" * 30)
@@ -3,7 +3,9 @@ import sqlite3
 import requests
 import feedparser
 import json
+import time
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Any, Tuple, Optional
 
@@ -18,14 +20,14 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 try:
     from functions.utils import log_error, log_info, load_file_lines
-    from functions.database_utils import init_db, save_digest_to_db, get_recent_digests
+    from functions.database_utils import init_db, save_digest_to_db, get_recent_digests, get_cached_feeds, save_feed_cache
     from functions.email_utils import build_email_content, send_email
     from functions.slack_utils import send_to_slack, build_slack_blocks
     from functions.social_media_utils import initialize_x_monitor, get_social_media_analysis, get_social_urgency_boost, format_social_media_section
     from functions.analysis_engine import analyze_headlines_with_ai, calculate_urgency_score
     from functions.economic_monitor import get_market_indicators, get_crypto_indicators
     from classes.config_loader import ConfigLoader
-    from classes.adaptive_intelligence import AdaptiveIntelligence
+    from classes.adaptive_intelligence import AdaptiveIntelligence, TermMatcher
     from classes.individual_feedback import IndividualFeedbackSystem
     from classes.smart_feedback import FeedbackSystem
 except ImportError:
@@ -33,14 +35,14 @@ except ImportError:
     sys.path.append(os.path.join(os.path.dirname(__file__), 'functions'))
     sys.path.append(os.path.join(os.path.dirname(__file__), 'classes'))
     from utils import log_error, log_info, load_file_lines
-    from database_utils import init_db, save_digest_to_db, get_recent_digests
+    from database_utils import init_db, save_digest_to_db, get_recent_digests, get_cached_feeds, save_feed_cache
     from email_utils import build_email_content, send_email
     from slack_utils import send_to_slack, build_slack_blocks
     from social_media_utils import initialize_x_monitor, get_social_media_analysis, get_social_urgency_boost, format_social_media_section
     from analysis_engine import analyze_headlines_with_ai, calculate_urgency_score
     from economic_monitor import get_market_indicators, get_crypto_indicators
     from config_loader import ConfigLoader
-    from adaptive_intelligence import AdaptiveIntelligence
+    from adaptive_intelligence import AdaptiveIntelligence, TermMatcher
     from individual_feedback import IndividualFeedbackSystem
     from smart_feedback import FeedbackSystem
 
@@ -56,6 +58,17 @@ except ImportError:
 # Adaptive intelligence already imported above
 ADAPTIVE_INTELLIGENCE_ENABLED = True
 
+# Shared by urgency assessment and learning, created on first use
+_intelligence = None
+
+
+def get_intelligence() -> AdaptiveIntelligence:
+    """Get the shared AdaptiveIntelligence instance"""
+    global _intelligence
+    if _intelligence is None:
+        _intelligence = AdaptiveIntelligence()
+    return _intelligence
+
 # Economic data sources for monitoring instability
 # Get configuration values
 
@@ -181,8 +194,25 @@ def fetch_economic_data() -> List[Dict[str, Any]]:
 
 # Fetch news headlines
 
+# Feeds are fetched concurrently; cap the pool so parsing many large feeds at
+# once doesn't balloon memory
+MAX_FEED_WORKERS = 8
+
+
+def _parse_feed(feed_url: str, cached: Optional[Dict[str, Any]] = None):
+    """Fetch and parse a single feed, logging failures instead of raising"""
+    try:
+        if cached:
+            # Conditional GET; an unchanged feed comes back as HTTP 304
+            return feedparser.parse(feed_url, etag=cached.get('etag'),
+                                    modified=cached.get('modified'))
+        return feedparser.parse(feed_url)
+    except Exception as e:
+        log_error(f"Failed to fetch from {feed_url}: {e}")
+        return None
+
 
-def fetch_news() -> str:
+def fetch_news() -> List[Dict[str, str]]:
     """Fetch news from configured sources"""
     # Get news sources from configuration
     if CONFIG_ENABLED:
@@ -200,27 +230,115 @@ def fetch_news() -> str:
                  "https://rss.cnn.com/rss/edition.rss"]
 
     headlines = []
+    if not feeds:
+        return headlines
+
+    # Feeds cached within the TTL are served without touching the network
+    cache = get_cached_feeds(feeds)
+    ttl_seconds = get_setting('monitoring.feed_cache_ttl_minutes', 60) * 60
+    now = time.time()
+    stale = [url for url in feeds
+             if url not in cache or now - cache[url]['fetched_at'] >= ttl_seconds]
+
+    # Network fetches run in parallel; entries are extracted in feed order
+    fetched = {}
+    if stale:
+        with ThreadPoolExecutor(max_workers=min(MAX_FEED_WORKERS, len(stale))) as executor:
+            results = executor.map(lambda url: _parse_feed(url, cache.get(url)), stale)
+            fetched = dict(zip(stale, results))
+
+    cache_updates = []
     for feed_url in feeds:
+        cached = cache.get(feed_url)
+        if feed_url not in fetched:
+            headlines.extend(cached['entries'])
+            continue
+
+        feed = fetched[feed_url]
+        if feed is None:
+            continue
+        if cached and feed.get('status') == 304:
+            headlines.extend(cached['entries'])
+            cache_updates.append((feed_url, cached['etag'], cached['modified'], cached['entries']))
+            continue
+
         try:
-            feed = feedparser.parse(feed_url)
+            entries = []
             for entry in feed.entries[:3]:
                 title = entry.title
                 link = entry.link
-                headlines.append({"url": link, "title": title})
+                entries.append({"url": link, "title": title})
         except Exception as e:
             log_error(f"Failed to fetch from {feed_url}: {e}")
-    return json.dumps(headlines)
+            continue
+        headlines.extend(entries)
+        if entries:
+            cache_updates.append((feed_url, feed.get('etag'), feed.get('modified'), entries))
+
+    save_feed_cache(cache_updates)
+    return headlines
+
+
+def fetch_sources() -> Tuple[List[Dict[str, str]], List[Dict[str, Any]]]:
+    """Fetch news headlines and economic data concurrently"""
+    # Both are network-bound and independent, so the slower one sets the pace
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        news_future = executor.submit(fetch_news)
+        economic_future = executor.submit(fetch_economic_data)
+        return news_future.result(), economic_future.result()
 
 # Assess urgency based on content analysis
 
+# Terms that place a configured keyword in the high or medium urgency tier
+HIGH_URGENCY_TERMS = ('crisis', 'crash', 'violence', 'fraud', 'martial', 'collapse')
+MEDIUM_URGENCY_TERMS = ('recession', 'unemployment', 'discrimination', 'inflation')
+
+_HIGH_TERM_MATCHER = TermMatcher(HIGH_URGENCY_TERMS)
+
+# (keywords, matcher, {lowercase keyword: (tier, occurrences)}), rebuilt only
+# when the configured keywords change
+_keyword_index = None
+
+
+def _get_keyword_index(keywords: List[str]):
+    """Matcher over the configured keywords and each keyword's urgency tier"""
+    global _keyword_index
+    keywords = tuple(keywords)
+    if _keyword_index is None or _keyword_index[0] != keywords:
+        tiers = {}
+        for keyword in keywords:
+            lowered = keyword.lower()
+            if lowered in tiers:
+                tier, count = tiers[lowered]
+                tiers[lowered] = (tier, count + 1)
+                continue
+            if any(term in lowered for term in HIGH_URGENCY_TERMS):
+                tier = 'high'
+            elif any(term in lowered for term in MEDIUM_URGENCY_TERMS):
+                tier = 'medium'
+            else:
+                tier = 'low'
+            tiers[lowered] = (tier, 1)
+        _keyword_index = (keywords, TermMatcher(tiers), tiers)
+    return _keyword_index[1], _keyword_index[2]
+
 
 def assess_urgency(headlines_data: List[Dict[str, Any]], economic_data: Optional[List[Dict[str, Any]]] = None) -> Tuple[int, str]:
     """Assess urgency using adaptive intelligence if available"""
 
-    # Get configuration values
+    if ADAPTIVE_INTELLIGENCE_ENABLED:
+        try:
+            intelligence = get_intelligence()
+            prediction = intelligence.predict_trend_urgency(headlines_data, economic_data)
+            # Write the prediction now so feedback can find it and a crash can't lose it
+            intelligence.flush()
+            return prediction
+        except Exception as e:
+            print(f"⚠️  Adaptive intelligence failed: {e}")
+            print("🔄 Falling back to configured urgency assessment...")
+
+    # Get configuration values (only the rule-based fallback needs them)
     keywords = get_keywords()
-    high_urgency_weight = get_setting(
-        'monitoring.scoring.high_urgency_keywords', 3)
     medium_urgency_weight = get_setting(
         'monitoring.scoring.medium_urgency_keywords', 2)
     low_urgency_weight = get_setting(
@@ -229,36 +347,26 @@ def assess_urgency(headlines_data: List[Dict[str, Any]], economic_data: Optional
     urgent_threshold = get_setting('system.urgent_analysis_score', 7.0)
     critical_threshold = get_setting('system.critical_analysis_score', 4.0)
 
-    if ADAPTIVE_INTELLIGENCE_ENABLED:
-        try:
-            intelligence = AdaptiveIntelligence()
-            return intelligence.predict_trend_urgency(headlines_data, economic_data)
-        except Exception as e:
-            print(f"⚠️  Adaptive intelligence failed: {e}")
-            print("🔄 Falling back to configured urgency assessment...")
-
     # Rule-based scoring using configured keywords
     urgency_score = 0
     all_text = " ".join([h.get('title', '') for h in headlines_data]).lower()
 
-    # Analyze against configured keywords
-    for keyword in keywords:
-        if keyword.lower() in all_text:
-            # Different weights based on keyword importance
-            if any(
-                term in keyword.lower() for term in [
-                    'crisis',
-                    'crash',
-                    'violence',
-                    'fraud',
-                    'martial',
-                    'collapse']):
-                urgency_score += len([h for h in headlines_data if any(
-                    keyword.lower() in h['title'].lower() for keyword in ['crisis', 'crash', 'violence', 'fraud', 'martial', 'collapse'])])
-            elif any(term in keyword.lower() for term in ['recession', 'unemployment', 'discrimination', 'inflation']):
-                urgency_score += medium_urgency_weight
-            else:
-                urgency_score += low_urgency_weight
+    # Analyze against configured keywords in a single scan of the text
+    matcher, keyword_tiers = _get_keyword_index(keywords)
+    high_headline_count = None
+    for keyword in matcher.find(all_text):
+        # Different weights based on keyword importance
+        tier, count = keyword_tiers[keyword]
+        if tier == 'high':
+            if high_headline_count is None:
+                high_headline_count = sum(
+                    1 for h in headlines_data
+                    if _HIGH_TERM_MATCHER.find(h['title'].lower()))
+            urgency_score += high_headline_count * count
+        elif tier == 'medium':
+            urgency_score += medium_urgency_weight * count
+        else:
+            urgency_score += low_urgency_weight * count
 
     # Factor in economic indicators
     for indicator in economic_data:
@@ -322,16 +430,11 @@ if __name__ == "__main__":
 
     init_db()
 
-    print("📰 Fetching news headlines...")
-    headlines_html = fetch_news()
-    headlines_data = json.loads(headlines_html)
+    print("📰 Fetching news headlines and economic data...")
+    headlines_data, economic_data = fetch_sources()
 
     if args.verbose:
         print(f"Fetched {len(headlines_data)} headlines")
-
-    print("📊 Fetching economic data...")
-    # Fetch economic data
-    economic_data = fetch_economic_data()
     
     print("📱 Initializing social media monitoring...")
     # Initialize X/Twitter monitoring if available
@@ -398,18 +501,19 @@ This would normally contain AI-generated analysis of current political and econo
         tone = "calm"
 
     print("📧 Building email content...")
-    email_html = build_email_content(summary_text, headlines_html, economic_data)
+    email_html = build_email_content(summary_text, headlines_data, economic_data)
 
     today = datetime.now().strftime("%B %d, %Y")
     subject = f"The Canary Protocol - Weekly Digest ({today}) - {urgency_level} URGENCY"
 
     # Always save to database (even in test mode)
-    save_digest_to_db(today, urgency_score, summary_text, urgency_level, headlines_html)
+    save_digest_to_db(today, urgency_score, summary_text, urgency_level,
+                      json.dumps(headlines_data, separators=(',', ':')))
 
     # Learn from this digest if adaptive intelligence is enabled
     if ADAPTIVE_INTELLIGENCE_ENABLED:
         try:
-            intelligence = AdaptiveIntelligence()
+            intelligence = get_intelligence()
             digest_data = {
                 'urgency_score': urgency_score,
                 'summary': summary_text,
@@ -466,8 +570,7 @@ def main():
             print("📊 Running standard analysis...")
             
         # For now, just run a basic test
-        headlines = fetch_news()
-        economic_data = fetch_economic_data()
+        headlines, economic_data = fetch_sources()
         
         if headlines:
             print(f"✅ Fetched {len(headlines)} headlines")
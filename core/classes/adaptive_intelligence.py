@@ -6,21 +6,17 @@ Implements machine learning and adaptive features for continuous improvement
 
 import sqlite3
 import json
+import atexit
 import os
 import re
+import time
+import weakref
 from datetime import datetime
 import sys
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-try:
-    from functions.utils import ensure_directory_exists
-except ImportError:
-    # Fallback for when running from different directory
-    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'functions'))
-    from utils import ensure_directory_exists
-
 try:
     from .base_db_class import BaseDBClass
 except ImportError:
@@ -31,15 +27,183 @@ except ImportError:
         sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
         from classes.base_db_class import BaseDBClass
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+# Headline terms scored by _calculate_base_urgency
+HIGH_URGENCY_TERMS = (
+    "martial law", "emergency powers", "constitutional crisis",
+    "bank run", "currency collapse", "hyperinflation", "recession",
+    "civil unrest", "widespread protests", "government shutdown"
+)
+MEDIUM_URGENCY_TERMS = (
+    "inflation", "unemployment rise", "market crash", "trade war",
+    "voting rights", "discrimination increase", "policy reversal"
+)
+URGENCY_TERM_WEIGHTS = {
+    **{term: 3 for term in HIGH_URGENCY_TERMS},
+    **{term: 1 for term in MEDIUM_URGENCY_TERMS},
+}
+
+# Political/economic keywords relevant to individual headlines, followed
+# by action words and intensity indicators
+HEADLINE_KEYWORDS = (
+    'supreme court', 'federal reserve', 'inflation', 'unemployment',
+    'recession', 'voting rights', 'constitution', 'emergency', 'crisis',
+    'protest', 'violence', 'market crash', 'martial law', 'shutdown',
+    'investigation', 'scandal', 'impeach', 'resign', 'arrest', 'fraud',
+    'corruption', 'breach', 'hack', 'attack', 'threat', 'warning', 'alert',
+    'surge', 'spike', 'collapse', 'ban', 'block', 'sanction', 'tariff',
+    'trade war', 'nuclear', 'military',
+    'breaks', 'announces', 'reveals', 'exposes', 'condemns', 'approves',
+    'rejects'
+)
+
+# Political/economic keywords tracked across whole digests
+DIGEST_KEYWORDS = (
+    'supreme court', 'federal reserve', 'inflation', 'unemployment',
+    'voting rights', 'constitution', 'emergency', 'crisis',
+    'protest', 'violence', 'recession', 'market crash'
+)
+
+
+class TermMatcher:
+    """Find which of a fixed set of terms occur in a text
+
+    With pyahocorasick installed the terms are compiled into one automaton
+    and the text is scanned once, however many terms there are; otherwise
+    each term is checked with a substring test. Either way a term matches
+    anywhere it appears as a substring, and matches come back in term order.
+    """
+
+    def __init__(self, terms):
+        self.terms = tuple(terms)
+        self.vocabulary = frozenset(self.terms)
+        self._automaton = None
+        if ahocorasick is not None and self.terms:
+            self._automaton = ahocorasick.Automaton()
+            for term in self.terms:
+                self._automaton.add_word(term, term)
+            self._automaton.make_automaton()
+
+    def find(self, text):
+        """Return the terms contained in text"""
+        if self._automaton is None:
+            return [term for term in self.terms if term in text]
+        found = {term for _, term in self._automaton.iter(text)}
+        return [term for term in self.terms if term in found]
+
+
+# Seconds get_adaptive_urgency_weights reuses its last query result; learning
+# on the same instance invalidates it immediately
+WEIGHTS_CACHE_TTL = 60
+
+# Buffered predictions are written once this many accumulate, and otherwise
+# on learning, reporting, close or interpreter exit; kept small so a crash
+# loses at most a handful of predictions
+PREDICTION_FLUSH_SIZE = 20
+
+# Joins pattern keywords in learning_patterns.keywords_concat (keywords may
+# contain spaces)
+KEYWORD_SEPARATOR = '|'
+
+# Stored in PRAGMA user_version once init_db has brought the schema (tables,
+# columns and indexes) up to date; bump whenever init_db changes
+SCHEMA_VERSION = 1
+
+# Tables and indexes init_db creates; all must exist for the version check
+# to skip setup (a migration rollback can drop tables without touching it)
+SCHEMA_OBJECTS = (
+    'learning_patterns', 'keyword_performance', 'source_reliability',
+    'prediction_tracking', 'idx_keyword_performance_correlation',
+    'idx_learning_patterns_type_confidence', 'idx_prediction_tracking_accuracy')
+
+
+def _dump_json(obj):
+    """Serialize stored pattern/factor data without padding or escapes"""
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+
+
+# Host part of a URL, without any leading "www."
+_DOMAIN_RE = re.compile(r'https?://(?:www\.)?([^/]+)')
+
+_URGENCY_MATCHER = TermMatcher(URGENCY_TERM_WEIGHTS)
+_HEADLINE_MATCHER = TermMatcher(HEADLINE_KEYWORDS)
+_DIGEST_MATCHER = TermMatcher(DIGEST_KEYWORDS)
+
+
 class AdaptiveIntelligence(BaseDBClass):
     def __init__(self, db_path="data/canary_protocol.db"):
+        self._conn = None
+        # (table version, vocabulary, keyword counts, thresholds, weights)
+        # for the urgency_boost patterns; see _load_boost_patterns
+        self._boost_patterns = None
+        self._weights_cache = None
+        self._weights_cache_time = 0.0
+        # (weights dict, lowered (keyword, weight) pairs, TermMatcher)
+        self._weights_matcher = None
+        self._pending_predictions = []
         super().__init__(db_path)
+        _LIVE_INSTANCES.add(self)
+
+    @property
+    def conn(self):
+        """Connection shared by every query on this instance, opened on first use"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            # Per-connection tuning only; the journal mode is left alone since
+            # the backup scripts copy the database file directly
+            self._conn.execute("PRAGMA temp_store=MEMORY")
+            self._conn.execute("PRAGMA cache_size=-20000")
+        return self._conn
+
+    def close(self):
+        """Write buffered predictions and close the shared connection"""
+        if self._conn is None and not self._pending_predictions:
+            return
+        self.flush()
+        self._conn.close()
+        self._conn = None
+
+    def flush(self):
+        """Write buffered predictions to prediction_tracking in one transaction"""
+        if not self._pending_predictions:
+            return
+        with self.conn as conn:
+            self._write_pending_predictions(conn.cursor())
+
+    def _write_pending_predictions(self, cursor):
+        """Insert buffered predictions using the caller's transaction"""
+        cursor.executemany('''
+            INSERT INTO prediction_tracking
+            (prediction_date, predicted_urgency, contributing_factors)
+            VALUES (?, ?, ?)
+        ''', self._pending_predictions)
+        self._pending_predictions = []
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
 
     def init_db(self):
         """Initialize tables for storing learning data"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.conn
         cursor = conn.cursor()
 
+        # Schema already current; skip the CREATE/ALTER statements
+        cursor.execute("PRAGMA user_version")
+        if cursor.fetchone()[0] == SCHEMA_VERSION:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM sqlite_master WHERE name IN "
+                f"({','.join('?' * len(SCHEMA_OBJECTS))})", SCHEMA_OBJECTS)
+            if cursor.fetchone()[0] == len(SCHEMA_OBJECTS):
+                return
+
         # Historical patterns table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS learning_patterns (
@@ -49,10 +213,20 @@ class AdaptiveIntelligence(BaseDBClass):
                 effectiveness_score REAL,
                 usage_count INTEGER DEFAULT 1,
                 last_updated TEXT,
-                confidence_level REAL DEFAULT 0.5
+                confidence_level REAL DEFAULT 0.5,
+                keywords_concat TEXT,
+                keyword_count INTEGER
             )
         ''')
 
+        # Keyword columns were added later; bring older databases up to date
+        cursor.execute("PRAGMA table_info(learning_patterns)")
+        pattern_columns = {row[1] for row in cursor.fetchall()}
+        if 'keywords_concat' not in pattern_columns:
+            cursor.execute("ALTER TABLE learning_patterns ADD COLUMN keywords_concat TEXT")
+        if 'keyword_count' not in pattern_columns:
+            cursor.execute("ALTER TABLE learning_patterns ADD COLUMN keyword_count INTEGER")
+
         # Keyword performance tracking
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS keyword_performance (
@@ -91,29 +265,51 @@ class AdaptiveIntelligence(BaseDBClass):
             )
         ''')
 
+        # Indexes for the filtered/ordered lookups on the prediction path
+        # (source_domain is already indexed by its UNIQUE constraint)
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_keyword_performance_correlation
+            ON keyword_performance(urgency_correlation)
+        ''')
+
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_learning_patterns_type_confidence
+            ON learning_patterns(pattern_type, confidence_level)
+        ''')
+
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_prediction_tracking_accuracy
+            ON prediction_tracking(prediction_accuracy)
+            WHERE prediction_accuracy IS NOT NULL
+        ''')
+
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
         conn.commit()
-        conn.close()
 
     def learn_from_digest(self, digest_data, user_feedback=None):
         """Learn from each digest generation"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        self._weights_cache = None
 
-        # Extract patterns from successful analysis
-        if digest_data.get('urgency_score', 0) > 0:
-            self._update_keyword_performance(digest_data, cursor)
-            self._update_source_reliability(digest_data, cursor)
-            self._store_successful_patterns(digest_data, cursor)
+        # Every write for the digest lands in one transaction
+        with self.conn as conn:
+            cursor = conn.cursor()
 
-        conn.commit()
-        conn.close()
+            # Extract patterns from successful analysis
+            if digest_data.get('urgency_score', 0) > 0:
+                self._update_keyword_performance(digest_data, cursor)
+                self._update_source_reliability(digest_data, cursor)
+                self._store_successful_patterns(digest_data, cursor)
+
+            if self._pending_predictions:
+                self._write_pending_predictions(cursor)
 
     def learn_from_individual_articles(self, digest_date=None):
         """Learn from individual article feedback - HIGHER PRIORITY than digest feedback"""
         if not digest_date:
             digest_date = datetime.now().strftime('%Y-%m-%d')
 
-        conn = sqlite3.connect(self.db_path)
+        self._weights_cache = None
+        conn = self.conn
         cursor = conn.cursor()
 
         # Get individual article feedback for this digest
@@ -127,7 +323,6 @@ class AdaptiveIntelligence(BaseDBClass):
         article_feedback = cursor.fetchall()
 
         if not article_feedback:
-            conn.close()
             return
 
         print(f"🧠 Learning from {len(article_feedback)} individual article ratings...")
@@ -157,7 +352,6 @@ class AdaptiveIntelligence(BaseDBClass):
                 self._process_irrelevant_article(title, source, cursor)
 
         conn.commit()
-        conn.close()
 
         print("✅ Individual article learning complete!")
 
@@ -175,19 +369,18 @@ class AdaptiveIntelligence(BaseDBClass):
 
         # Extract and weight keywords from headline
         keywords = self._extract_keywords_from_headline(title)
-        for keyword in keywords:
-            # Update keyword performance with higher weight
-            correlation = (user_rating / 10.0) * ARTICLE_WEIGHT_MULTIPLIER
 
-            cursor.execute('''
-                INSERT OR REPLACE INTO keyword_performance
-                (keyword, urgency_correlation, last_seen)
-                VALUES (?, ?, ?)
-                ON CONFLICT(keyword) DO UPDATE SET
-                urgency_correlation = (urgency_correlation + ?) / 2,
-                last_seen = ?
-            ''', (keyword, correlation, datetime.now().isoformat(),
-                  correlation, datetime.now().isoformat()))
+        # Update keyword performance with higher weight
+        correlation = (user_rating / 10.0) * ARTICLE_WEIGHT_MULTIPLIER
+        now = datetime.now().isoformat()
+        cursor.executemany('''
+            INSERT INTO keyword_performance
+            (keyword, urgency_correlation, last_seen)
+            VALUES (?, ?, ?)
+            ON CONFLICT(keyword) DO UPDATE SET
+            urgency_correlation = (urgency_correlation + excluded.urgency_correlation) / 2,
+            last_seen = excluded.last_seen
+        ''', [(keyword, correlation, now) for keyword in keywords])
 
         # Update source reliability at article level
         domain = self._extract_domain_from_source(source)
@@ -198,7 +391,7 @@ class AdaptiveIntelligence(BaseDBClass):
             source_accuracy *= ARTICLE_WEIGHT_MULTIPLIER  # Higher weight
 
             cursor.execute('''
-                INSERT OR REPLACE INTO source_reliability
+                INSERT INTO source_reliability
                 (source_domain, total_articles, verified_accurate, accuracy_score)
                 VALUES (?, 1, ?, ?)
                 ON CONFLICT(source_domain) DO UPDATE SET
@@ -224,8 +417,8 @@ class AdaptiveIntelligence(BaseDBClass):
                 INSERT INTO learning_patterns
                 (pattern_type, pattern_data, effectiveness_score, confidence_level, last_updated)
                 VALUES (?, ?, ?, ?, ?)
-            ''', ('headline_pattern', json.dumps(pattern_data), effectiveness,
-                  confidence, datetime.now().isoformat()))
+            ''', ('headline_pattern', _dump_json(pattern_data), effectiveness,
+                  confidence, now))
 
     def _process_irrelevant_article(self, title, source, cursor):
         """Learn from articles marked as irrelevant - important for noise reduction"""
@@ -244,83 +437,22 @@ class AdaptiveIntelligence(BaseDBClass):
             INSERT INTO learning_patterns
             (pattern_type, pattern_data, effectiveness_score, confidence_level, last_updated)
             VALUES (?, ?, ?, ?, ?)
-        ''', ('irrelevant_pattern', json.dumps(pattern_data), 0.0, 0.8,
+        ''', ('irrelevant_pattern', _dump_json(pattern_data), 0.0, 0.8,
               datetime.now().isoformat()))
 
         # Reduce correlation for keywords found in irrelevant articles
-        for keyword in keywords:
-            cursor.execute('''
-                UPDATE keyword_performance
-                SET urgency_correlation = urgency_correlation * 0.9
-                WHERE keyword = ?
-            ''', (keyword,))
+        cursor.executemany('''
+            UPDATE keyword_performance
+            SET urgency_correlation = urgency_correlation * 0.9
+            WHERE keyword = ?
+        ''', [(keyword,) for keyword in keywords])
 
     def _extract_keywords_from_headline(self, headline):
         """Extract keywords from individual headline - more targeted than digest keywords"""
         if not headline:
             return []
 
-        # Political/economic keywords relevant to headlines
-        important_terms = [
-            'supreme court',
-            'federal reserve',
-            'inflation',
-            'unemployment',
-            'recession',
-            'voting rights',
-            'constitution',
-            'emergency',
-            'crisis',
-            'protest',
-            'violence',
-            'market crash',
-            'martial law',
-            'shutdown',
-            'investigation',
-            'scandal',
-            'impeach',
-            'resign',
-            'arrest',
-            'fraud',
-            'corruption',
-            'breach',
-            'hack',
-            'attack',
-            'threat',
-            'warning',
-            'alert',
-            'surge',
-            'spike',
-            'collapse',
-            'ban',
-            'block',
-            'sanction',
-            'tariff',
-            'trade war',
-            'nuclear',
-            'military']
-
-        headline_lower = headline.lower()
-        found_keywords = []
-
-        for term in important_terms:
-            if term in headline_lower:
-                found_keywords.append(term)
-
-        # Also extract action words and intensity indicators
-        action_words = [
-            'breaks',
-            'announces',
-            'reveals',
-            'exposes',
-            'condemns',
-            'approves',
-            'rejects']
-        for word in action_words:
-            if word in headline_lower:
-                found_keywords.append(word)
-
-        return found_keywords
+        return _HEADLINE_MATCHER.find(headline.lower())
 
     def _analyze_headline_structure(self, headline):
         """Analyze structural patterns in headlines that correlate with urgency"""
@@ -366,73 +498,57 @@ class AdaptiveIntelligence(BaseDBClass):
         """Track reliability and bias of news sources"""
         sources = digest_data.get('sources', [])
         urgency = digest_data.get('urgency_score', 0)
-
-        for source in sources:
-            domain = self._extract_domain(source)
-
-            # Update source statistics
-            cursor.execute('''
-                INSERT OR REPLACE INTO source_reliability
-                (source_domain, total_articles)
-                VALUES (?, 1)
-                ON CONFLICT(source_domain) DO UPDATE SET
-                total_articles = total_articles + 1
-            ''', (domain,))
-
-            # Update accuracy based on urgency correlation
-            if urgency > 5:  # High urgency articles
-                cursor.execute('''
-                    UPDATE source_reliability
-                    SET verified_accurate = verified_accurate + 1,
-                        accuracy_score = (CAST(verified_accurate AS REAL) / total_articles)
-                    WHERE source_domain = ?
-                ''', (domain,))
+        high_urgency = urgency > 5  # High urgency articles count as verified
+
+        # Update source statistics and, for high urgency digests, accuracy in
+        # the same statement; SET expressions read the row's prior values
+        cursor.executemany('''
+            INSERT INTO source_reliability
+            (source_domain, total_articles, verified_accurate, accuracy_score)
+            VALUES (?, 1, ?, CASE WHEN ? THEN 0.0 ELSE 0.5 END)
+            ON CONFLICT(source_domain) DO UPDATE SET
+            total_articles = total_articles + 1,
+            verified_accurate = verified_accurate + excluded.verified_accurate,
+            accuracy_score = CASE WHEN excluded.verified_accurate
+                THEN CAST(verified_accurate AS REAL) / (total_articles + 1)
+                ELSE accuracy_score END
+        ''', [(self._extract_domain(source), high_urgency, high_urgency)
+              for source in sources])
 
     def _extract_domain(self, url):
         """Extract domain from URL"""
-        import re
-        match = re.search(r'https?://(?:www\.)?([^/]+)', url)
+        match = _DOMAIN_RE.search(url)
         return match.group(1) if match else url
 
     def _update_keyword_performance(self, digest_data, cursor):
         """Track which keywords correlate with actual urgency"""
         keywords = self._extract_keywords_from_digest(digest_data)
         urgency = digest_data.get('urgency_score', 0)
+        now = datetime.now().isoformat()
 
-        for keyword in keywords:
-            cursor.execute('''
-                INSERT OR REPLACE INTO keyword_performance
-                (keyword, urgency_correlation, last_seen)
-                VALUES (?, ?, ?)
-                ON CONFLICT(keyword) DO UPDATE SET
-                urgency_correlation = (urgency_correlation + ?) / 2,
-                last_seen = ?
-            ''', (keyword, urgency, datetime.now().isoformat(), urgency, datetime.now().isoformat()))
+        cursor.executemany('''
+            INSERT INTO keyword_performance
+            (keyword, urgency_correlation, last_seen)
+            VALUES (?, ?, ?)
+            ON CONFLICT(keyword) DO UPDATE SET
+            urgency_correlation = (urgency_correlation + excluded.urgency_correlation) / 2,
+            last_seen = excluded.last_seen
+        ''', [(keyword, urgency, now) for keyword in keywords])
 
     def _extract_keywords_from_digest(self, digest_data):
         """Extract meaningful keywords from digest content"""
         text = digest_data.get('summary', '') + ' ' + \
             str(digest_data.get('top_headlines', ''))
 
-        # Political/economic keywords
-        important_terms = [
-            'supreme court', 'federal reserve', 'inflation', 'unemployment',
-            'voting rights', 'constitution', 'emergency', 'crisis',
-            'protest', 'violence', 'recession', 'market crash'
-        ]
-
-        found_keywords = []
-        text_lower = text.lower()
-        for term in important_terms:
-            if term in text_lower:
-                found_keywords.append(term)
-
-        return found_keywords
+        return _DIGEST_MATCHER.find(text.lower())
 
     def get_adaptive_urgency_weights(self):
         """Get learned weights for urgency calculation"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        if (self._weights_cache is not None
+                and time.monotonic() - self._weights_cache_time < WEIGHTS_CACHE_TTL):
+            return self._weights_cache
+
+        cursor = self.conn.cursor()
 
         cursor.execute('''
             SELECT keyword, urgency_correlation
@@ -441,7 +557,8 @@ class AdaptiveIntelligence(BaseDBClass):
         ''')
 
         high_impact_keywords = dict(cursor.fetchall())
-        conn.close()
+        self._weights_cache = high_impact_keywords
+        self._weights_cache_time = time.monotonic()
 
         return high_impact_keywords
 
@@ -449,36 +566,45 @@ class AdaptiveIntelligence(BaseDBClass):
         """Enhanced urgency prediction using learned patterns - prioritizes individual article feedback"""
         base_urgency = self._calculate_base_urgency(headlines, economic_data)
 
-        # Apply learned keyword weights (prioritize article-level learning)
-        learned_weights = self.get_adaptive_urgency_weights()
         headline_text = ' '.join([h.get('title', '') for h in headlines])
         
         # Get individual article pattern boost (highest priority)
         article_pattern_boost = self._get_individual_article_pattern_boost(headline_text)
         
-        # Calculate urgency boost from learned weights
-        urgency_boost = 0
-        for keyword, weight in learned_weights.items():
-            if keyword.lower() in headline_text.lower():
-                urgency_boost += weight
+        # Apply learned keyword weights (prioritize article-level learning)
+        urgency_boost = self._get_learned_keyword_boost(headline_text)
 
         # Historical digest-level pattern matching (lower priority)
         digest_pattern_boost = self._get_pattern_match_boost(
             headlines, economic_data)
 
         # Combine with individual article patterns having 2x weight
-        final_urgency = min(10, base_urgency + urgency_boost +
-                            (article_pattern_boost * 2.0) + digest_pattern_boost)
+        final_urgency = (base_urgency + urgency_boost +
+                         (article_pattern_boost * 2.0) + digest_pattern_boost)
+        if final_urgency >= 10:
+            final_urgency = 10
 
         # Store prediction for later accuracy tracking
         self._store_prediction(final_urgency, headlines, economic_data)
 
         return int(final_urgency), self._get_urgency_level(final_urgency)
 
+    def _get_learned_keyword_boost(self, headline_text):
+        """Sum the learned weights of every keyword found in the headlines"""
+        learned_weights = self.get_adaptive_urgency_weights()
+        if self._weights_matcher is None or self._weights_matcher[0] is not learned_weights:
+            # Rebuilt only when the weights cache refreshes
+            lowered = [(keyword.lower(), weight) for keyword, weight in learned_weights.items()]
+            self._weights_matcher = (
+                learned_weights, lowered, TermMatcher(dict.fromkeys(k for k, _ in lowered)))
+
+        _, lowered, matcher = self._weights_matcher
+        found = set(matcher.find(headline_text.lower()))
+        return sum(weight for keyword, weight in lowered if keyword in found)
+
     def _get_individual_article_pattern_boost(self, headline_text):
         """Get urgency boost based on individual article patterns - HIGH PRIORITY"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.conn.cursor()
 
         # Look for headline patterns from individual article feedback
         cursor.execute('''
@@ -498,15 +624,17 @@ class AdaptiveIntelligence(BaseDBClass):
         ''')
 
         irrelevant_patterns = cursor.fetchall()
-        conn.close()
 
         boost = 0
 
+        # The headline's structure is the same for every pattern comparison
+        current_structure = self._analyze_headline_structure(headline_text)
+
         # Check against irrelevant patterns first (reduce false positives)
         for pattern_data, in irrelevant_patterns:
             try:
                 pattern = json.loads(pattern_data)
-                if self._headline_matches_pattern(headline_text, pattern):
+                if self._headline_matches_pattern(headline_text, pattern, current_structure):
                     boost -= 1.0  # Reduce urgency for patterns marked as irrelevant
             except BaseException:
                 continue
@@ -515,14 +643,17 @@ class AdaptiveIntelligence(BaseDBClass):
         for pattern_data, effectiveness, confidence in patterns:
             try:
                 pattern = json.loads(pattern_data)
-                if self._headline_matches_pattern(headline_text, pattern):
+                if self._headline_matches_pattern(headline_text, pattern, current_structure):
                     boost += effectiveness * confidence
             except BaseException:
                 continue
 
-        return max(-2.0, min(boost, 3.0))  # Cap the boost/reduction
+        # Cap the boost/reduction
+        if boost > 3.0:
+            return 3.0
+        return boost if boost > -2.0 else -2.0
 
-    def _headline_matches_pattern(self, headline_text, pattern):
+    def _headline_matches_pattern(self, headline_text, pattern, current_structure=None):
         """Check if headline matches stored pattern from individual article feedback"""
         keywords = pattern.get('keywords', [])
         headline_structure = pattern.get('headline_structure', {})
@@ -533,10 +664,18 @@ class AdaptiveIntelligence(BaseDBClass):
         keyword_score = keyword_matches / \
             max(len(keywords), 1) if keywords else 0
 
+        # Keyword similarity alone decides the clear cases, so structure is
+        # only compared in the 30-60% band where it can tip the result
+        if keyword_score > 0.6:
+            return True
+        if keyword_score <= 0.3:
+            return False
+
         # Structure matching (length, caps, etc.)
         structure_score = 0
         if headline_structure:
-            current_structure = self._analyze_headline_structure(headline_text)
+            if current_structure is None:
+                current_structure = self._analyze_headline_structure(headline_text)
 
             # Compare key structural elements
             if abs(
@@ -557,35 +696,14 @@ class AdaptiveIntelligence(BaseDBClass):
                     0) > 0:
                 structure_score += 0.4
 
-        # Pattern matches if keyword similarity > 60% or structure + some
-        # keywords match
-        return keyword_score > 0.6 or (
-            keyword_score > 0.3 and structure_score > 0.4)
+        # Some keywords matched, so the structure has to match as well
+        return structure_score > 0.4
 
     def _calculate_base_urgency(self, headlines, economic_data):
         """Calculate base urgency using existing logic"""
-        urgency_score = 0
-
-        high_urgency_terms = [
-            "martial law", "emergency powers", "constitutional crisis",
-            "bank run", "currency collapse", "hyperinflation", "recession",
-            "civil unrest", "widespread protests", "government shutdown"
-        ]
-
-        medium_urgency_terms = [
-            "inflation", "unemployment rise", "market crash", "trade war",
-            "voting rights", "discrimination increase", "policy reversal"
-        ]
-
         all_text = " ".join([h.get('title', '') for h in headlines]).lower()
-
-        for term in high_urgency_terms:
-            if term in all_text:
-                urgency_score += 3
-
-        for term in medium_urgency_terms:
-            if term in all_text:
-                urgency_score += 1
+        urgency_score = sum(
+            URGENCY_TERM_WEIGHTS[term] for term in _URGENCY_MATCHER.find(all_text))
 
         # Economic indicators
         for indicator in economic_data:
@@ -594,64 +712,106 @@ class AdaptiveIntelligence(BaseDBClass):
             elif indicator.get('concern_level') == 'medium':
                 urgency_score += 1
 
-        return min(urgency_score, 10)
+        return urgency_score if urgency_score <= 10 else 10
 
     def _get_pattern_match_boost(self, headlines, economic_data):
         """Find similar historical patterns and apply learned urgency adjustments"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
+        vocabulary, keyword_counts, thresholds, weights = self._load_boost_patterns()
+        if not len(weights):
+            return 0
+
+        # Deferred so processes with no qualifying patterns never load NumPy
+        import numpy as np
+
+        # Scan the current headlines once, mark which pattern keywords are
+        # present, then score every pattern with one matrix product
+        current_text = ' '.join([h.get('title', '') for h in headlines]).lower()
+        current_keywords = set(_DIGEST_MATCHER.find(current_text))
+        present = [
+            keyword in current_keywords
+            # Keywords outside the digest vocabulary (older patterns) fall
+            # back to a direct substring test
+            or (keyword not in _DIGEST_MATCHER.vocabulary and keyword in current_text)
+            for keyword in vocabulary]
+
+        matches = keyword_counts @ np.array(present, dtype=np.int32)
+        matched = matches >= thresholds  # 60% keyword match
+        boost = sum(weights[matched].tolist())
+
+        return boost if boost <= 2 else 2  # Cap the boost
+
+    def _load_boost_patterns(self):
+        """Load urgency_boost patterns as a pattern x keyword count matrix
+
+        The matrix is rebuilt only when the set of qualifying patterns
+        changes (new rows or archival deletes), so predictions skip the
+        per-pattern JSON parsing.
+        """
+        cursor = self.conn.cursor()
         cursor.execute('''
-            SELECT pattern_data, effectiveness_score, confidence_level
+            SELECT COUNT(*), MAX(id)
             FROM learning_patterns
             WHERE pattern_type = 'urgency_boost' AND confidence_level > 0.7
         ''')
+        version = cursor.fetchone()
+        if self._boost_patterns is not None and self._boost_patterns[0] == version:
+            return self._boost_patterns[1:]
 
-        patterns = cursor.fetchall()
-        conn.close()
+        cursor.execute('''
+            SELECT keywords_concat, keyword_count, pattern_data,
+                   effectiveness_score, confidence_level
+            FROM learning_patterns
+            WHERE pattern_type = 'urgency_boost' AND confidence_level > 0.7
+            ORDER BY id
+        ''')
 
-        boost = 0
-        for pattern_data, effectiveness, confidence in patterns:
+        vocabulary = {}
+        rows = []
+        weights = []
+        for keywords_concat, keyword_count, pattern_data, effectiveness, confidence in cursor.fetchall():
             try:
-                pattern = json.loads(pattern_data)
-                if self._pattern_matches_current(
-                        pattern, headlines, economic_data):
-                    boost += effectiveness * confidence
+                if keywords_concat is not None:
+                    keywords = keywords_concat.split(KEYWORD_SEPARATOR) if keyword_count else []
+                else:
+                    # Rows stored before the keyword columns existed
+                    keywords = json.loads(pattern_data).get('keywords', [])
+                weight = effectiveness * confidence
+                if not all(isinstance(keyword, str) for keyword in keywords):
+                    continue
             except BaseException:
                 continue
-
-        return min(boost, 2)  # Cap the boost
-
-    def _pattern_matches_current(self, pattern, headlines, economic_data):
-        """Check if stored pattern matches current situation"""
-        # Simple pattern matching - can be enhanced
-        pattern_keywords = pattern.get('keywords', [])
-        current_text = ' '.join([h.get('title', '')
-                                for h in headlines]).lower()
-
-        matches = sum(
-            1 for keyword in pattern_keywords if keyword in current_text)
-        return matches >= len(pattern_keywords) * 0.6  # 60% keyword match
+            rows.append([vocabulary.setdefault(keyword, len(vocabulary)) for keyword in keywords])
+            weights.append(weight)
+
+        if not rows:
+            self._boost_patterns = (version, (), None, None, ())
+            return self._boost_patterns[1:]
+
+        import numpy as np
+        keyword_counts = np.zeros((len(rows), len(vocabulary)), dtype=np.int32)
+        for row, columns in enumerate(rows):
+            np.add.at(keyword_counts[row], columns, 1)
+
+        self._boost_patterns = (
+            version,
+            tuple(vocabulary),
+            keyword_counts,
+            keyword_counts.sum(axis=1) * 0.6,
+            np.array(weights, dtype=np.float64))
+        return self._boost_patterns[1:]
 
     def _store_prediction(self, predicted_urgency, headlines, economic_data):
-        """Store prediction for later accuracy evaluation"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
+        """Buffer prediction for later accuracy evaluation (written by flush)"""
         factors = {
             'headline_count': len(headlines),
             'economic_indicators': len(economic_data),
             'high_concern_economic': len([e for e in economic_data if e.get('concern_level') == 'high'])
         }
 
-        cursor.execute('''
-            INSERT INTO prediction_tracking
-            (prediction_date, predicted_urgency, contributing_factors)
-            VALUES (?, ?, ?)
-        ''', (datetime.now().isoformat(), predicted_urgency, json.dumps(factors)))
-
-        conn.commit()
-        conn.close()
+        self._pending_predictions.append(
+            (datetime.now().isoformat(), predicted_urgency, _dump_json(factors)))
+        if len(self._pending_predictions) >= PREDICTION_FLUSH_SIZE:
+            self.flush()
 
     def _get_urgency_level(self, score):
         """Convert numeric score to level"""
@@ -671,16 +831,20 @@ class AdaptiveIntelligence(BaseDBClass):
                 'economic_factors': len(digest_data.get('economic_data', []))
             }
 
+            # Keywords are also stored in their own columns so pattern
+            # matching can read them without decoding pattern_data
             cursor.execute('''
                 INSERT INTO learning_patterns
-                (pattern_type, pattern_data, effectiveness_score, last_updated)
-                VALUES (?, ?, ?, ?)
-            ''', ('urgency_boost', json.dumps(pattern), digest_data.get('urgency_score') / 10.0, datetime.now().isoformat()))
+                (pattern_type, pattern_data, effectiveness_score, last_updated,
+                 keywords_concat, keyword_count)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', ('urgency_boost', _dump_json(pattern), digest_data.get('urgency_score') / 10.0, datetime.now().isoformat(),
+                  KEYWORD_SEPARATOR.join(pattern['keywords']), len(pattern['keywords'])))
 
     def get_intelligence_report(self):
         """Generate a report on learning progress"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        self.flush()
+        cursor = self.conn.cursor()
 
         # Top performing keywords
         cursor.execute('''
@@ -691,19 +855,17 @@ class AdaptiveIntelligence(BaseDBClass):
         ''')
         top_keywords = cursor.fetchall()
 
-        # Pattern count
-        cursor.execute('SELECT COUNT(*) FROM learning_patterns')
-        pattern_count = cursor.fetchone()[0]
-
-        # Prediction accuracy (if we have feedback)
+        # Pattern count and prediction accuracy (if we have feedback)
         cursor.execute('''
-            SELECT AVG(prediction_accuracy)
-            FROM prediction_tracking
-            WHERE prediction_accuracy IS NOT NULL
+            SELECT
+                (SELECT COUNT(*) FROM learning_patterns),
+                (SELECT AVG(prediction_accuracy)
+                 FROM prediction_tracking
+                 WHERE prediction_accuracy IS NOT NULL)
         ''')
-        avg_accuracy = cursor.fetchone()[0] or 0
+        pattern_count, avg_accuracy = cursor.fetchone()
+        avg_accuracy = avg_accuracy or 0
 
-        conn.close()
 
         report = f"""
 🧠 CANARY PROTOCOL INTELLIGENCE REPORT
@@ -736,6 +898,31 @@ class AdaptiveIntelligence(BaseDBClass):
         return report
 
 
+# Instances that may still hold buffered predictions; weak so registering
+# doesn't keep them alive
+_LIVE_INSTANCES = weakref.WeakSet()
+
+
+def flush_pending_predictions():
+    """Write predictions buffered on every live instance
+
+    Call before reading or updating prediction_tracking through another
+    connection, so rows still in a buffer aren't missed.
+    """
+    for instance in list(_LIVE_INSTANCES):
+        instance.flush()
+
+
+@atexit.register
+def _flush_at_exit():
+    """Write any predictions still buffered on live instances at exit"""
+    for instance in list(_LIVE_INSTANCES):
+        try:
+            instance.close()
+        except Exception:
+            pass
+
+
 def enhance_urgency_assessment():
     """Enhanced urgency assessment using machine learning"""
     intelligence = AdaptiveIntelligence()
@@ -6,10 +6,10 @@ Tests backup restoration regularly to ensure data integrity
 
 import sqlite3
 import os
-import shutil
-import tempfile
 import hashlib
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
@@ -19,16 +19,71 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 try:
-    from functions.utils import log_info, log_error, log_warning, safe_db_operation
+    from functions.utils import log_info, log_error, log_warning
 except ImportError:
     # Fallback for when running from different directory
     sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'functions'))
-    from utils import log_info, log_error, log_warning, safe_db_operation
+    from utils import log_info, log_error, log_warning
 try:
     from .config_loader import ConfigLoader
 except ImportError:
     from config_loader import ConfigLoader
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Read size for checksumming when hashlib.file_digest is unavailable
+CHECKSUM_CHUNK_SIZE = 1024 * 1024
+
+# Upper bound on backups verified at the same time
+MAX_VERIFICATION_WORKERS = 8
+
+# Applied to every connection opened for verification: nothing is written,
+# and reads go through a memory map and a larger page cache
+READ_ONLY_PRAGMAS = """
+    PRAGMA query_only=ON;
+    PRAGMA mmap_size=268435456;
+    PRAGMA cache_size=-65536;
+    PRAGMA temp_store=MEMORY;
+"""
+
+# Key tables whose first records are checked for NOT NULL violations
+SAMPLE_CHECK_TABLES = ("weekly_digests", "daily_headlines", "user_feedback")
+
+
+def _null_probe_sql(table: str, columns: Tuple[str, ...], limit: int) -> str:
+    """SQL expression that is 1 when any of a table's first records has a NULL in columns"""
+    quoted = ['"' + column.replace('"', '""') + '"' for column in columns]
+    return (f"EXISTS (SELECT 1 FROM (SELECT {', '.join(quoted)} FROM {table} LIMIT {limit}) "
+            f"WHERE {' OR '.join(c + ' IS NULL' for c in quoted)})")
+
+
+def _checksum_file_for(backup_file: Path) -> Path:
+    """Path of the .sha256 sidecar that accompanies a backup"""
+    if backup_file.suffix == '.tar.gz':
+        # Handle .tar.gz.sha256 case
+        return Path(str(backup_file).replace('.tar.gz', '.sha256'))
+    return backup_file.with_suffix(backup_file.suffix + '.sha256')
+
+
+def _read_json(path: Path) -> Any:
+    """Load a JSON file, through orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _write_json(path: Path, data: Any, indent: bool = False):
+    """Write data as JSON, through orjson when it is installed"""
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0, default=str))
+        return
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2 if indent else None, default=str)
+
 
 class BackupVerificationManager:
     """Manages backup verification and restoration testing"""
@@ -40,6 +95,12 @@ class BackupVerificationManager:
         self.backup_dir = Path("backups")
         self.verification_dir = Path("data/verification")
         self.verification_dir.mkdir(exist_ok=True)
+        self.verification_cache_file = self.verification_dir / "verified_cache.json"
+        self.verification_index_file = self.verification_dir / "index.jsonl"
+        # (st_mtime_ns, DDL digest, schema) of self.db_path; see _load_original_schema
+        self._original_schema_cache = None
+        # Combined sample-check queries by (sample limit, NOT NULL columns per table)
+        self._sample_check_sql = {}
         
         # Verification settings
         self.verification_config = self.config.get("backup_verification", {
@@ -52,47 +113,104 @@ class BackupVerificationManager:
     
     def calculate_file_checksum(self, file_path: Path) -> str:
         """Calculate SHA256 checksum of a file"""
-        sha256_hash = hashlib.sha256()
         try:
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    sha256_hash.update(chunk)
-            return sha256_hash.hexdigest()
+            with open(file_path, "rb", buffering=0) as f:
+                if hasattr(hashlib, "file_digest"):
+                    # Python 3.11+: hashed in C without per-chunk interpreter work
+                    return hashlib.file_digest(f, "sha256").hexdigest()
+                # Read into one reusable buffer rather than a new bytes per chunk
+                sha256_hash = hashlib.sha256()
+                buffer = bytearray(CHECKSUM_CHUNK_SIZE)
+                view = memoryview(buffer)
+                while True:
+                    size = f.readinto(buffer)
+                    if not size:
+                        break
+                    sha256_hash.update(view[:size])
+                return sha256_hash.hexdigest()
         except Exception as e:
             log_error(f"Failed to calculate checksum for {file_path}: {e}")
             return ""
     
     def get_database_schema(self, db_path: str) -> Dict[str, Any]:
         """Get database schema information"""
-        def get_schema():
+        return self._read_only_operation(db_path, self._read_schema, {})
+    
+    def _connect_ro(self, db_path: str, immutable: bool = False) -> sqlite3.Connection:
+        """Open a database for verification reads
+        
+        immutable is for backup files, which nothing writes while they are
+        verified: SQLite then skips file locking and journal checks.
+        """
+        if immutable:
+            conn = sqlite3.connect(Path(db_path).resolve().as_uri() + "?mode=ro&immutable=1", uri=True)
+        else:
             conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            # Get all tables
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = [row[0] for row in cursor.fetchall()]
-            
-            schema = {}
-            for table in tables:
-                # Get table info
-                cursor.execute(f"PRAGMA table_info({table})")
-                columns = cursor.fetchall()
-                
-                # Get row count
-                cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                row_count = cursor.fetchone()[0]
-                
-                schema[table] = {
-                    "columns": [{"name": col[1], "type": col[2], "notnull": col[3], "pk": col[5]} for col in columns],
-                    "row_count": row_count
-                }
+        conn.executescript(READ_ONLY_PRAGMAS)
+        return conn
+    
+    def _read_only_operation(self, db_path: str, operation_func, default: Any,
+                             immutable: bool = False) -> Any:
+        """Run operation_func(cursor) on a read-only connection, returning default on failure"""
+        try:
+            conn = self._connect_ro(db_path, immutable)
+            try:
+                return operation_func(conn.cursor())
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            log_error(f"Database operation failed: {e}")
+            return default
+    
+    def _read_schema(self, cursor) -> Dict[str, Any]:
+        """Table and column structure of the database behind cursor"""
+        # Get all tables
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        tables = [row[0] for row in cursor.fetchall()]
+        
+        schema = {}
+        for table in tables:
+            # Get table info
+            cursor.execute(f"PRAGMA table_info({table})")
+            columns = cursor.fetchall()
             
-            conn.close()
-            return schema
+            # Structure only: row counts would need a full scan per table
+            # and play no part in the schema comparison
+            schema[table] = {
+                "columns": [{"name": col[1], "type": col[2], "notnull": col[3], "pk": col[5]} for col in columns]
+            }
         
-        return safe_db_operation(db_path, get_schema, default={})
+        return schema
+    
+    def _read_ddl_digest(self, cursor) -> Tuple[str, int]:
+        """SHA256 of every table and index definition, plus the table count"""
+        cursor.execute("SELECT type, sql FROM sqlite_master WHERE type IN ('table', 'index') ORDER BY type, name")
+        rows = cursor.fetchall()
+        ddl = '\n'.join(row[1] or '' for row in rows)
+        return hashlib.sha256(ddl.encode()).hexdigest(), sum(1 for row in rows if row[0] == 'table')
     
-    def verify_backup_integrity(self, backup_file: Path) -> Dict[str, Any]:
+    def _load_original_schema(self) -> Tuple[Optional[str], Dict[str, Any]]:
+        """DDL digest and schema of the live database, reused until the file changes"""
+        try:
+            mtime_ns = os.stat(self.db_path).st_mtime_ns
+        except OSError:
+            # No live database: no digest to match, and opening it would
+            # create an empty file
+            return None, {}
+        
+        if (self._original_schema_cache is None
+                or self._original_schema_cache[0] != mtime_ns):
+            digest = self._read_only_operation(self.db_path, lambda cursor: self._read_ddl_digest(cursor)[0], None)
+            self._original_schema_cache = (mtime_ns, digest, self.get_database_schema(self.db_path))
+        return self._original_schema_cache[1:]
+    
+    def _get_original_schema(self) -> Dict[str, Any]:
+        """Schema of the live database"""
+        return self._load_original_schema()[1]
+    
+    def verify_backup_integrity(self, backup_file: Path,
+                                original_schema: Optional[Dict[str, Any]] = None,
+                                schema_digest: Optional[str] = None) -> Dict[str, Any]:
         """Verify the integrity of a backup file using SHA256 checksum comparison"""
         verification_result = {
             "backup_file": str(backup_file),
@@ -114,10 +232,7 @@ class BackupVerificationManager:
             verification_result["file_size_bytes"] = backup_file.stat().st_size
             
             # Look for corresponding .sha256 file
-            sha256_file = backup_file.with_suffix(backup_file.suffix + '.sha256')
-            if backup_file.suffix == '.tar.gz':
-                # Handle .tar.gz.sha256 case
-                sha256_file = Path(str(backup_file).replace('.tar.gz', '.sha256'))
+            sha256_file = _checksum_file_for(backup_file)
             
             verification_result["checksum_file_exists"] = sha256_file.exists()
             
@@ -144,7 +259,7 @@ class BackupVerificationManager:
                 if backup_file.suffix == '.tar.gz':
                     verification_result.update(self._verify_tar_gz_basic(backup_file))
                 elif backup_file.suffix == '.db':
-                    verification_result.update(self._verify_db_backup(backup_file))
+                    verification_result.update(self._verify_db_backup(backup_file, original_schema, schema_digest))
                 else:
                     verification_result["checksum_match"] = backup_file.stat().st_size > 0
             
@@ -247,8 +362,34 @@ class BackupVerificationManager:
         
         return result
     
-    def _verify_db_backup(self, db_file: Path) -> Dict[str, Any]:
+    def _verify_db_backup(self, db_file: Path,
+                          original_schema: Optional[Dict[str, Any]] = None,
+                          schema_digest: Optional[str] = None) -> Dict[str, Any]:
         """Verify a direct database file"""
+        try:
+            conn = self._connect_ro(str(db_file), immutable=True)
+        except sqlite3.Error as e:
+            # Files that are not databases already fail on the first PRAGMA
+            return {
+                "database_readable": False,
+                "schema_valid": False,
+                "data_sample_valid": False,
+                "errors": [f"Database verification failed: {e}"]
+            }
+        try:
+            return self._verify_db_connection(conn, original_schema, schema_digest)
+        finally:
+            conn.close()
+    
+    def _verify_db_connection(self, conn: sqlite3.Connection,
+                              original_schema: Optional[Dict[str, Any]] = None,
+                              schema_digest: Optional[str] = None) -> Dict[str, Any]:
+        """Check readability, schema and sample data over one open connection
+        
+        original_schema and schema_digest come from _load_original_schema;
+        callers verifying many backups pass them in so the live database is
+        not looked up again for each one.
+        """
         result = {
             "database_readable": False,
             "schema_valid": False,
@@ -257,21 +398,25 @@ class BackupVerificationManager:
         }
         
         try:
-            # Test database readability
-            conn = sqlite3.connect(str(db_file))
+            # Reading the schema definitions doubles as the readability test
             cursor = conn.cursor()
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = cursor.fetchall()
-            conn.close()
+            ddl_digest, table_count = self._read_ddl_digest(cursor)
             
             result["database_readable"] = True
-            result["table_count"] = len(tables)
+            result["table_count"] = table_count
             
             # Verify schema
-            backup_schema = self.get_database_schema(str(db_file))
-            original_schema = self.get_database_schema(self.db_path)
+            if original_schema is None:
+                schema_digest, original_schema = self._load_original_schema()
+            elif schema_digest is None:
+                schema_digest = self._load_original_schema()[0]
             
+            # Identical definitions match by construction; only a differing
+            # digest needs the per-table comparison to find what changed
             schema_matches = True
+            backup_schema = None
+            if ddl_digest != schema_digest:
+                backup_schema = self._read_schema(cursor)
             if original_schema and backup_schema:
                 for table_name, table_info in original_schema.items():
                     if table_name not in backup_schema:
@@ -289,7 +434,7 @@ class BackupVerificationManager:
             result["schema_valid"] = schema_matches
             
             # Sample data verification
-            sample_valid = self.verify_data_sample(str(db_file))
+            sample_valid = self._check_data_sample(cursor)
             result["data_sample_valid"] = sample_valid
             
         except Exception as e:
@@ -300,54 +445,79 @@ class BackupVerificationManager:
     def verify_data_sample(self, backup_db_path: str) -> bool:
         """Verify a sample of data from the backup"""
         try:
-            sample_size = self.verification_config.get("test_sample_size", 100)
-            
-            def check_sample():
-                conn = sqlite3.connect(backup_db_path)
-                cursor = conn.cursor()
-                
-                # Test key tables with sample data
-                test_tables = ["weekly_digests", "daily_headlines", "user_feedback"]
-                
-                for table in test_tables:
-                    try:
-                        # Check if table exists and has data
-                        cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                        count = cursor.fetchone()[0]
-                        
-                        if count > 0:
-                            # Sample some records
-                            cursor.execute(f"SELECT * FROM {table} LIMIT {min(sample_size, count)}")
-                            sample_records = cursor.fetchall()
-                            
-                            # Basic validation - ensure records have expected structure
-                            if not sample_records:
-                                return False
-                            
-                            # Check for null values in critical fields
-                            cursor.execute(f"PRAGMA table_info({table})")
-                            columns = cursor.fetchall()
-                            
-                            for record in sample_records[:10]:  # Check first 10 records
-                                for i, col_info in enumerate(columns):
-                                    if col_info[3] and record[i] is None:  # NOT NULL constraint violated
-                                        return False
-                    
-                    except sqlite3.Error:
-                        # Table might not exist, which is okay for some tables
-                        continue
-                
-                conn.close()
-                return True
-            
-            return safe_db_operation(backup_db_path, check_sample, default=False)
-            
+            return self._read_only_operation(backup_db_path, self._check_data_sample, False, immutable=True)
         except Exception as e:
             log_error(f"Data sample verification failed: {e}")
             return False
     
-    def test_backup_restoration(self, backup_file: Path) -> Dict[str, Any]:
-        """Test full restoration of a backup to a temporary location"""
+    def _check_data_sample(self, cursor) -> bool:
+        """Sample the key tables behind cursor for NOT NULL violations"""
+        sample_limit = min(self.verification_config.get("test_sample_size", 100), 10)
+        
+        # Only NOT NULL columns can be violated; one query finds them for
+        # every key table present
+        try:
+            cursor.execute(f"""
+                SELECT m.name, p.name FROM sqlite_master m, pragma_table_info(m.name) p
+                WHERE m.type = 'table' AND m.name IN ({', '.join('?' * len(SAMPLE_CHECK_TABLES))})
+                AND p."notnull"
+                ORDER BY p.cid
+            """, SAMPLE_CHECK_TABLES)
+        except sqlite3.Error:
+            return True
+        
+        notnull_columns = {}
+        for table, column in cursor.fetchall():
+            notnull_columns.setdefault(table, []).append(column)
+        checks = [(table, tuple(notnull_columns[table]))
+                  for table in SAMPLE_CHECK_TABLES if table in notnull_columns]
+        
+        if not checks:
+            return True
+        
+        # One query probes every table; built once per column layout
+        cache_key = (sample_limit, tuple(checks))
+        sql = self._sample_check_sql.get(cache_key)
+        if sql is None:
+            sql = "SELECT " + " OR ".join(
+                _null_probe_sql(table, columns, sample_limit) for table, columns in checks)
+            self._sample_check_sql[cache_key] = sql
+        
+        try:
+            cursor.execute(sql)
+            return not cursor.fetchone()[0]
+        except sqlite3.Error:
+            pass
+        
+        # One unreadable table fails the combined query; probe the tables
+        # separately and skip the ones that cannot be read
+        for table, columns in checks:
+            try:
+                cursor.execute("SELECT " + _null_probe_sql(table, columns, sample_limit))
+                if cursor.fetchone()[0]:
+                    return False  # NOT NULL constraint violated
+            except sqlite3.Error:
+                continue
+        
+        return True
+    
+    def _run_operation_tests(self, cursor) -> Dict[str, Any]:
+        """Run basic queries against a restored database"""
+        # Test a basic query and a simple join in one statement
+        cursor.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM sqlite_master WHERE type='table'),
+                (SELECT COUNT(*) FROM weekly_digests w
+                 LEFT JOIN user_feedback f ON w.date = f.digest_date)
+        """)
+        table_count, join_result = cursor.fetchone()
+        
+        return {"table_count": table_count, "join_test": join_result}
+    
+    def test_backup_restoration(self, backup_file: Path,
+                                original_schema: Optional[Dict[str, Any]] = None,
+                                schema_digest: Optional[str] = None) -> Dict[str, Any]:
+        """Test full restoration of a backup into an in-memory database"""
         restoration_result = {
             "backup_file": str(backup_file),
             "tested_at": datetime.now().isoformat(),
@@ -362,23 +532,27 @@ class BackupVerificationManager:
             restoration_result["errors"].append("Backup file does not exist")
             return restoration_result
         
-        # Create temporary database for restoration test
-        with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as temp_db:
-            temp_db_path = temp_db.name
-            restoration_result["temp_db_path"] = temp_db_path
+        # Restore with SQLite's online backup API straight into memory, so
+        # the backup is read once and nothing is written back to disk
+        restoration_result["temp_db_path"] = ":memory:"
+        restored = sqlite3.connect(":memory:")
         
         try:
-            start_time = datetime.now()
+            # Monotonic clock for durations; tested_at stays wall-clock
+            start_time = time.perf_counter_ns()
             
-            # Copy backup to temporary location
-            shutil.copy2(backup_file, temp_db_path)
+            source = self._connect_ro(str(backup_file), immutable=True)
+            try:
+                source.backup(restored)
+            finally:
+                source.close()
             
-            copy_time = datetime.now()
-            restoration_result["performance_metrics"]["copy_time_seconds"] = (copy_time - start_time).total_seconds()
+            copy_time = time.perf_counter_ns()
+            restoration_result["performance_metrics"]["copy_time_seconds"] = (copy_time - start_time) / 1e9
             
             # Verify the restored database
-            verification_result = self.verify_backup_integrity(Path(temp_db_path))
-            restoration_result["restoration_successful"] = verification_result["overall_valid"]
+            verification_result = self._verify_db_connection(restored, original_schema, schema_digest)
+            restoration_result["restoration_successful"] = not verification_result["errors"]
             restoration_result["data_integrity_verified"] = verification_result["data_sample_valid"]
             
             if verification_result["errors"]:
@@ -386,47 +560,111 @@ class BackupVerificationManager:
             
             # Test some basic operations on restored database
             try:
-                def test_operations():
-                    conn = sqlite3.connect(temp_db_path)
-                    cursor = conn.cursor()
-                    
-                    # Test basic queries
-                    cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table'")
-                    table_count = cursor.fetchone()[0]
-                    
-                    # Test a simple join if possible
-                    cursor.execute("""
-                        SELECT COUNT(*) FROM weekly_digests w 
-                        LEFT JOIN user_feedback f ON w.date = f.digest_date
-                    """)
-                    join_result = cursor.fetchone()[0]
-                    
-                    conn.close()
-                    return {"table_count": table_count, "join_test": join_result}
-                
-                operation_results = safe_db_operation(temp_db_path, test_operations, default={})
-                restoration_result["operation_tests"] = operation_results
-                
+                restoration_result["operation_tests"] = self._run_operation_tests(restored.cursor())
+            except sqlite3.Error as e:
+                # Tables used by the join may legitimately be absent
+                log_warning(f"Operation test skipped for {backup_file}: {e}")
+                restoration_result["operation_tests"] = None
             except Exception as e:
                 restoration_result["errors"].append(f"Operation test failed: {e}")
             
-            end_time = datetime.now()
-            restoration_result["performance_metrics"]["total_time_seconds"] = (end_time - start_time).total_seconds()
-            restoration_result["performance_metrics"]["verification_time_seconds"] = (end_time - copy_time).total_seconds()
+            end_time = time.perf_counter_ns()
+            restoration_result["performance_metrics"]["total_time_seconds"] = (end_time - start_time) / 1e9
+            restoration_result["performance_metrics"]["verification_time_seconds"] = (end_time - copy_time) / 1e9
             
         except Exception as e:
             restoration_result["errors"].append(f"Restoration test failed: {e}")
         
         finally:
-            # Clean up temporary file
-            try:
-                if os.path.exists(temp_db_path):
-                    os.unlink(temp_db_path)
-            except Exception as e:
-                log_warning(f"Failed to clean up temporary file {temp_db_path}: {e}")
+            restored.close()
         
         return restoration_result
     
+    def _verify_one(self, backup_file: Path, original_schema: Dict[str, Any],
+                    stat: Optional[os.stat_result] = None,
+                    cached_restorations: Optional[Dict[str, Any]] = None,
+                    schema_digest: Optional[str] = None) -> Dict[str, Any]:
+        """Integrity check and, for SQLite backups, restoration test of one backup"""
+        try:
+            log_info(f"Verifying backup: {backup_file}")
+            
+            if stat is None:
+                stat = backup_file.stat()
+            
+            # Basic integrity check
+            integrity_result = self.verify_backup_integrity(backup_file, original_schema, schema_digest)
+            
+            # Full restoration test (for critical backups)
+            restoration_result = None
+            if backup_file.name.endswith('.db'):  # Only test SQLite backups
+                restoration_result = self._test_restoration_cached(
+                    backup_file, integrity_result, original_schema, stat.st_size, cached_restorations or {},
+                    schema_digest)
+            
+            verification_result = {
+                "backup_file": str(backup_file),
+                "backup_age_days": (datetime.now() - datetime.fromtimestamp(stat.st_mtime)).days,
+                "integrity_check": integrity_result,
+                "restoration_test": restoration_result,
+                "overall_status": "PASS" if integrity_result["overall_valid"] else "FAIL"
+            }
+            
+            if restoration_result and not restoration_result["restoration_successful"]:
+                verification_result["overall_status"] = "FAIL"
+            
+            return verification_result
+            
+        except Exception as e:
+            log_error(f"Failed to verify backup {backup_file}: {e}")
+            return {
+                "backup_file": str(backup_file),
+                "overall_status": "ERROR",
+                "error": str(e)
+            }
+    
+    def _test_restoration_cached(self, backup_file: Path, integrity_result: Dict[str, Any],
+                                 original_schema: Dict[str, Any], size: int,
+                                 cached_restorations: Dict[str, Any],
+                                 schema_digest: Optional[str] = None) -> Dict[str, Any]:
+        """Restoration test, skipped when identical bytes already restored successfully"""
+        checksum = integrity_result.get("actual_checksum") or self.calculate_file_checksum(backup_file)
+        
+        cached = cached_restorations.get(checksum) if checksum else None
+        if cached and cached.get("size") == size and cached["restoration_test"].get("restoration_successful"):
+            return dict(cached["restoration_test"], backup_file=str(backup_file),
+                        reused_from_checksum_cache=True)
+        
+        restoration_result = self.test_backup_restoration(backup_file, original_schema, schema_digest)
+        restoration_result["backup_checksum"] = checksum
+        return restoration_result
+    
+    def _load_verification_cache(self, schema_key: Optional[str]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Passing results and successful restorations from earlier runs,
+        dropped if the live schema has changed"""
+        # Without a live schema there is nothing the cached results were checked against
+        if schema_key is None:
+            return {}, {}
+        try:
+            cache = _read_json(self.verification_cache_file)
+        except (OSError, ValueError):
+            return {}, {}
+        
+        if cache.get("schema") != schema_key:
+            return {}, {}
+        return cache.get("backups", {}), cache.get("restorations", {})
+    
+    def _save_verification_cache(self, schema_key: Optional[str], backups: Dict[str, Any],
+                                 restorations: Dict[str, Any]):
+        """Persist passing results keyed by backup path, size and mtime, and
+        successful restorations keyed by checksum"""
+        if schema_key is None:
+            return
+        try:
+            _write_json(self.verification_cache_file,
+                        {"schema": schema_key, "backups": backups, "restorations": restorations})
+        except (OSError, TypeError) as e:
+            log_warning(f"Failed to save verification cache: {e}")
+    
     def run_backup_verification(self) -> Dict[str, Any]:
         """Run comprehensive backup verification"""
         verification_report = {
@@ -469,53 +707,81 @@ class BackupVerificationManager:
         max_age_days = self.verification_config.get("max_backup_age_days", 30)
         cutoff_date = datetime.now() - timedelta(days=max_age_days)
         
+        # One stat per backup serves the age filter, cache keys, ages and sizes
         recent_backups = []
         for backup_file in backup_files:
-            backup_time = datetime.fromtimestamp(backup_file.stat().st_mtime)
-            if backup_time > cutoff_date:
-                recent_backups.append(backup_file)
+            stat = backup_file.stat()
+            if datetime.fromtimestamp(stat.st_mtime) > cutoff_date:
+                recent_backups.append((backup_file, stat))
         
         log_info(f"Found {len(recent_backups)} recent backups to verify")
         
-        # Verify each backup
-        for backup_file in recent_backups:
+        # Every backup is compared against the same live schema
+        schema_key, original_schema = self._load_original_schema()
+        
+        # Backups unchanged since they last passed reuse that result
+        cached_results, cached_restorations = self._load_verification_cache(schema_key)
+        cache_keys = []
+        results = []
+        pending = []
+        for backup_file, stat in recent_backups:
+            # The checksum sidecar is part of the key, so replacing, corrupting
+            # or deleting it invalidates the cached checksum result
             try:
-                log_info(f"Verifying backup: {backup_file}")
-                
-                # Basic integrity check
-                integrity_result = self.verify_backup_integrity(backup_file)
-                
-                # Full restoration test (for critical backups)
-                restoration_result = None
-                if backup_file.name.endswith('.db'):  # Only test SQLite backups
-                    restoration_result = self.test_backup_restoration(backup_file)
-                
-                verification_result = {
-                    "backup_file": str(backup_file),
-                    "backup_age_days": (datetime.now() - datetime.fromtimestamp(backup_file.stat().st_mtime)).days,
-                    "integrity_check": integrity_result,
-                    "restoration_test": restoration_result,
-                    "overall_status": "PASS" if integrity_result["overall_valid"] else "FAIL"
+                sidecar = _checksum_file_for(backup_file).stat()
+                sidecar_key = f"{sidecar.st_size}:{sidecar.st_mtime_ns}"
+            except OSError:
+                sidecar_key = "no-sha256"
+            cache_key = f"{backup_file}:{stat.st_size}:{stat.st_mtime_ns}:{sidecar_key}"
+            cache_keys.append(cache_key)
+            
+            cached = cached_results.get(cache_key)
+            if cached and cached.get("overall_status") == "PASS":
+                backup_age_days = (datetime.now() - datetime.fromtimestamp(stat.st_mtime)).days
+                results.append(dict(cached, backup_age_days=backup_age_days, cached=True))
+            else:
+                results.append(None)
+                pending.append((len(results) - 1, backup_file, stat))
+        
+        if cached_results:
+            log_info(f"Reusing {len(results) - len(pending)} cached verification results")
+        
+        # Verify the rest concurrently; hashing and SQLite release the GIL.
+        # Results are aggregated afterwards, in discovery order
+        if pending:
+            workers = min(MAX_VERIFICATION_WORKERS, len(pending))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                fresh_results = executor.map(
+                    lambda item: self._verify_one(item[1], original_schema, item[2], cached_restorations,
+                                                  schema_key),
+                    pending)
+                for (index, _, _), verification_result in zip(pending, fresh_results):
+                    results[index] = verification_result
+        
+        # Only passing results and successful restorations are worth keeping,
+        # and only for backups that are still present
+        restorations = {}
+        for (_, stat), result in zip(recent_backups, results):
+            restoration = result.get("restoration_test")
+            if restoration and restoration.get("restoration_successful") and restoration.get("backup_checksum"):
+                restorations[restoration["backup_checksum"]] = {
+                    "size": stat.st_size,
+                    "restoration_test": {k: v for k, v in restoration.items()
+                                         if k != "reused_from_checksum_cache"}
                 }
-                
-                if restoration_result and not restoration_result["restoration_successful"]:
-                    verification_result["overall_status"] = "FAIL"
-                
-                verification_report["verification_results"].append(verification_result)
-                
-                if verification_result["overall_status"] == "PASS":
-                    verification_report["backups_verified"] += 1
-                else:
-                    verification_report["backups_failed"] += 1
-                    
-            except Exception as e:
-                log_error(f"Failed to verify backup {backup_file}: {e}")
+        self._save_verification_cache(schema_key, {
+            cache_key: {k: v for k, v in result.items() if k != "cached"}
+            for cache_key, result in zip(cache_keys, results)
+            if result["overall_status"] == "PASS"
+        }, restorations)
+        
+        for verification_result in results:
+            verification_report["verification_results"].append(verification_result)
+            
+            if verification_result["overall_status"] == "PASS":
+                verification_report["backups_verified"] += 1
+            else:
                 verification_report["backups_failed"] += 1
-                verification_report["verification_results"].append({
-                    "backup_file": str(backup_file),
-                    "overall_status": "ERROR",
-                    "error": str(e)
-                })
         
         # Generate summary
         total_backups = len(recent_backups) if recent_backups else verification_report["backups_found"]
@@ -523,7 +789,7 @@ class BackupVerificationManager:
             "success_rate": (verification_report["backups_verified"] / total_backups * 100) if total_backups > 0 else 0,
             "oldest_verified_backup": None,
             "newest_verified_backup": None,
-            "total_backup_size_mb": sum(b.stat().st_size for b in recent_backups) / (1024 * 1024) if recent_backups else 0
+            "total_backup_size_mb": sum(stat.st_size for _, stat in recent_backups) / (1024 * 1024) if recent_backups else 0
         }
         
         # Find oldest and newest verified backups
@@ -535,34 +801,95 @@ class BackupVerificationManager:
         
         verification_report["completed_at"] = datetime.now().isoformat()
         
-        # Save verification report
-        report_file = self.verification_dir / f"verification_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(report_file, 'w') as f:
-            json.dump(verification_report, f, indent=2, default=str)
+        # Save verification report; microseconds keep runs within the same
+        # second from overwriting each other's report
+        report_file = self.verification_dir / f"verification_report_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json"
+        _write_json(report_file, verification_report, indent=True)
+        if self.verification_index_file.exists():
+            self._append_to_index([self._index_entry(verification_report, report_file)])
+        else:
+            # First indexed run: index every report on disk, this one included
+            self._read_verification_index()
         
         log_info(f"Backup verification completed. {verification_report['backups_verified']}/{verification_report['backups_found']} backups verified successfully")
         log_info(f"Verification report saved to: {report_file}")
         
         return verification_report
     
-    def get_verification_history(self, days: int = 30) -> List[Dict[str, Any]]:
-        """Get verification history for the last N days"""
-        cutoff_date = datetime.now() - timedelta(days=days)
+    def _index_entry(self, report: Dict[str, Any], report_file: Path) -> Dict[str, Any]:
+        """One-line summary of a verification report for index.jsonl"""
+        return {
+            "started_at": report.get("started_at"),
+            "completed_at": report.get("completed_at"),
+            "backups_found": report.get("backups_found", 0),
+            "backups_verified": report.get("backups_verified", 0),
+            "backups_failed": report.get("backups_failed", 0),
+            "success_rate": report.get("summary", {}).get("success_rate", 0),
+            "report_file": str(report_file)
+        }
+    
+    def _append_to_index(self, entries: List[Dict[str, Any]]):
+        """Append report summaries to index.jsonl"""
+        try:
+            with open(self.verification_index_file, 'ab') as f:
+                for entry in entries:
+                    f.write(orjson.dumps(entry) if orjson is not None else json.dumps(entry).encode())
+                    f.write(b'\n')
+        except OSError as e:
+            log_warning(f"Failed to update verification index: {e}")
+    
+    def _read_verification_index(self) -> List[Dict[str, Any]]:
+        """Report summaries in run order, indexing existing reports on first use"""
+        if not self.verification_index_file.exists():
+            entries = []
+            for report_file in sorted(self.verification_dir.glob("verification_report_*.json")):
+                try:
+                    entries.append(self._index_entry(_read_json(report_file), report_file))
+                except Exception as e:
+                    log_warning(f"Failed to load verification report {report_file}: {e}")
+            self._append_to_index(entries)
+            return entries
+        
+        # A report indexed more than once (e.g. overwritten by an older run
+        # in the same second) keeps only its latest entry
+        loads = orjson.loads if orjson is not None else json.loads
+        entries = {}
+        with open(self.verification_index_file, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    try:
+                        entry = loads(line)
+                    except ValueError as e:
+                        log_warning(f"Skipping malformed verification index entry: {e}")
+                        continue
+                    entries.pop(entry.get("report_file"), None)
+                    entries[entry.get("report_file")] = entry
+        return list(entries.values())
+    
+    def get_verification_history(self, days: int = 30, summary_only: bool = False) -> List[Dict[str, Any]]:
+        """Get verification history for the last N days
+        
+        With summary_only, return the index.jsonl summaries instead of
+        loading each full report.
+        """
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat()
         
         history = []
-        for report_file in sorted(self.verification_dir.glob("verification_report_*.json")):
+        for entry in self._read_verification_index():
+            if (entry.get("started_at") or "") <= cutoff:
+                continue
+            if summary_only:
+                history.append(entry)
+                continue
             try:
-                file_time = datetime.fromtimestamp(report_file.stat().st_mtime)
-                if file_time > cutoff_date:
-                    with open(report_file, 'r') as f:
-                        report_data = json.load(f)
-                        history.append(report_data)
+                history.append(_read_json(Path(entry["report_file"])))
+            except FileNotFoundError:
+                continue
             except Exception as e:
-                log_warning(f"Failed to load verification report {report_file}: {e}")
+                log_warning(f"Failed to load verification report {entry['report_file']}: {e}")
         
         return history
 
-
 if __name__ == "__main__":
     import argparse
     
@@ -599,7 +926,7 @@ if __name__ == "__main__":
             for error in result["errors"]:
                 print(f"  Error: {error}")
     elif args.history:
-        history = manager.get_verification_history(args.history)
+        history = manager.get_verification_history(args.history, summary_only=True)
         print(f"Verification history (last {args.history} days):")
         for report in history[-5:]:  # Show last 5 reports
             print(f"  {report['started_at']}: {report['backups_verified']}/{report['backups_found']} verified")
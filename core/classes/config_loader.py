@@ -8,10 +8,14 @@ import os
 import yaml
 from typing import Dict, Any
 
+# Marks a dot-notation path that isn't present in the configuration
+_MISSING = object()
+
 
 class ConfigLoader:
     _instance = None
     _config = None
+    _lookup_cache: Dict[str, Any] = {}
     
     def __new__(cls, config_dir="config"):
         if cls._instance is None:
@@ -44,6 +48,7 @@ class ConfigLoader:
 
         # Merge configurations (user overrides defaults)
         self._config = self._deep_merge(defaults, user_config)
+        self._lookup_cache = {}
         return self._config
 
     def _load_yaml_file(self, filepath: str) -> Dict[str, Any]:
@@ -122,17 +127,26 @@ class ConfigLoader:
         if not self._config:
             self.load_config()
 
-        keys = key_path.split('.')
+        # Resolved paths are memoized; the cache is reset whenever the
+        # configuration is (re)loaded
+        try:
+            value = self._lookup_cache[key_path]
+        except KeyError:
+            value = self._lookup_cache[key_path] = self._resolve(key_path)
+        return default if value is _MISSING else value
+
+    def _resolve(self, key_path: str) -> Any:
+        """Walk the configuration for a dot-notation path"""
         value = self._config
 
         try:
-            for key in keys:
+            for key in key_path.split('.'):
                 if value is None:
-                    return default
+                    return _MISSING
                 value = value[key]
             return value
         except (KeyError, TypeError):
-            return default
+            return _MISSING
 
     def get_section(self, section: str) -> Dict[str, Any]:
         """Get entire configuration section"""
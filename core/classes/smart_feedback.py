@@ -188,10 +188,15 @@ class FeedbackSystem(BaseDBClass):
 
     def _update_intelligence_from_feedback(self, predicted, actual, comments):
         """Update AI intelligence based on user feedback"""
-        from adaptive_intelligence import CanaryIntelligence
-
-        intelligence = CanaryIntelligence()
-        conn = sqlite3.connect(intelligence.db_path)
+        try:
+            from .adaptive_intelligence import flush_pending_predictions
+        except ImportError:
+            from adaptive_intelligence import flush_pending_predictions
+
+        # Predictions may still be buffered on an AdaptiveIntelligence
+        # instance in this process; write them so the UPDATE can find them
+        flush_pending_predictions()
+        conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
         # Update prediction accuracy
@@ -4,35 +4,77 @@ Database utilities for Canary Protocol
 Handles database initialization, operations, and migrations
 """
 
+import atexit
 import sqlite3
 import os
+import threading
+import json
+import hashlib
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
+from typing import Iterator, List, Dict, Any, Optional, Tuple
 try:
     from .utils import log_error, log_info, create_directory
 except ImportError:
     from utils import log_error, log_info, create_directory
 
 
+# One connection per database path, reused for the life of the process.
+# Callers from worker threads (e.g. fetch_news) share it, so every use goes
+# through _connection(), which holds that database's lock
+_CONNECTIONS: Dict[str, sqlite3.Connection] = {}
+_CONNECTION_LOCKS: Dict[str, threading.RLock] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+@contextmanager
+def _connection(db_path: str) -> Iterator[sqlite3.Connection]:
+    """Hold the shared connection for db_path, opening it on first use"""
+    with _REGISTRY_LOCK:
+        lock = _CONNECTION_LOCKS.setdefault(db_path, threading.RLock())
+    with lock:
+        conn = _CONNECTIONS.get(db_path)
+        if conn is None:
+            conn = sqlite3.connect(db_path, check_same_thread=False)
+            # Per-connection tuning only; the journal mode is left alone since
+            # the backup scripts copy the database file directly
+            conn.execute("PRAGMA temp_store=MEMORY")
+            _CONNECTIONS[db_path] = conn
+        yield conn
+
+
+@atexit.register
+def close_connections() -> None:
+    """Close every shared connection; the next use reopens it"""
+    with _REGISTRY_LOCK:
+        paths = list(_CONNECTION_LOCKS.items())
+    for db_path, lock in paths:
+        with lock:
+            conn = _CONNECTIONS.pop(db_path, None)
+            if conn is not None:
+                conn.close()
+
+
 def init_db(db_path: str = "data/canary_protocol.db") -> bool:
     """Initialize the database with required tables"""
     try:
         # Ensure data directory exists
         create_directory(os.path.dirname(db_path))
         
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        with _connection(db_path) as conn:
+            with conn:
+                cursor = conn.cursor()
         
-        # Create tables
-        _create_weekly_digests_table(cursor)
-        _create_feedback_table(cursor)
-        _create_learning_data_table(cursor)
-        _create_ab_test_table(cursor)
+                # Create tables
+                _create_weekly_digests_table(cursor)
+                _create_feedback_table(cursor)
+                _create_learning_data_table(cursor)
+                _create_ab_test_table(cursor)
+                _create_feed_cache_table(cursor)
         
-        conn.commit()
-        conn.close()
-        log_info("Database initialized successfully")
-        return True
+            log_info("Database initialized successfully")
+            return True
         
     except Exception as e:
         log_error(f"Database initialization error: {e}")
@@ -98,20 +140,94 @@ def _create_ab_test_table(cursor: sqlite3.Cursor) -> None:
     ''')
 
 
+def _create_feed_cache_table(cursor: sqlite3.Cursor) -> None:
+    """Create feed_cache table for conditional RSS fetches"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS feed_cache (
+            url_hash TEXT PRIMARY KEY,
+            feed_url TEXT NOT NULL,
+            etag TEXT,
+            modified TEXT,
+            entries_json TEXT NOT NULL,
+            fetched_at REAL NOT NULL
+        )
+    ''')
+
+
+def _feed_url_hash(feed_url: str) -> str:
+    """Cache key for a feed URL"""
+    return hashlib.sha1(feed_url.encode('utf-8')).hexdigest()
+
+
+def get_cached_feeds(feed_urls: List[str],
+                     db_path: str = "data/canary_protocol.db") -> Dict[str, Dict[str, Any]]:
+    """Get cached feed entries and validators, keyed by feed URL"""
+    if not feed_urls:
+        return {}
+    try:
+        with _connection(db_path) as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+
+            hashes = {_feed_url_hash(url): url for url in feed_urls}
+            placeholders = ",".join("?" * len(hashes))
+            cursor.execute(f'''
+                SELECT url_hash, etag, modified, entries_json, fetched_at
+                FROM feed_cache
+                WHERE url_hash IN ({placeholders})
+            ''', list(hashes))
+
+            cached = {}
+            for row in cursor.fetchall():
+                cached[hashes[row['url_hash']]] = {
+                    'etag': row['etag'],
+                    'modified': row['modified'],
+                    'entries': json.loads(row['entries_json']),
+                    'fetched_at': row['fetched_at']
+                }
+            return cached
+
+    except Exception as e:
+        log_error(f"Feed cache query error: {e}")
+        return {}
+
+
+def save_feed_cache(feeds: List[Tuple[str, Optional[str], Optional[str], List[Dict[str, str]]]],
+                    db_path: str = "data/canary_protocol.db") -> bool:
+    """Store (feed_url, etag, modified, entries) tuples in the feed cache"""
+    if not feeds:
+        return True
+    try:
+        with _connection(db_path) as conn:
+            with conn:
+                cursor = conn.cursor()
+                now = time.time()
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO feed_cache
+                    (url_hash, feed_url, etag, modified, entries_json, fetched_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', [(_feed_url_hash(url), url, etag, modified, json.dumps(entries), now)
+                      for url, etag, modified, entries in feeds])
+            return True
+
+    except Exception as e:
+        log_error(f"Feed cache save error: {e}")
+        return False
+
+
 def save_digest_to_db(date: str, urgency: int, summary: str, tone: str, 
                      headlines: str, db_path: str = "data/canary_protocol.db") -> bool:
     """Save digest record to database"""
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO weekly_digests (date, urgency_score, summary, tone_used, top_headlines)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (date, urgency, summary, tone, headlines))
-        conn.commit()
-        conn.close()
-        log_info(f"Digest saved to database: {date}")
-        return True
+        with _connection(db_path) as conn:
+            with conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO weekly_digests (date, urgency_score, summary, tone_used, top_headlines)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (date, urgency, summary, tone, headlines))
+            log_info(f"Digest saved to database: {date}")
+            return True
     except Exception as e:
         log_error(f"Database save error: {e}")
         return False
@@ -120,20 +236,19 @@ def save_digest_to_db(date: str, urgency: int, summary: str, tone: str,
 def get_recent_digests(limit: int = 10, db_path: str = "data/canary_protocol.db") -> List[Dict[str, Any]]:
     """Get recent digest records from database"""
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        with _connection(db_path) as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
         
-        cursor.execute('''
-            SELECT * FROM weekly_digests 
-            ORDER BY created_at DESC 
-            LIMIT ?
-        ''', (limit,))
+            cursor.execute('''
+                SELECT * FROM weekly_digests 
+                ORDER BY created_at DESC 
+                LIMIT ?
+            ''', (limit,))
         
-        rows = cursor.fetchall()
-        conn.close()
+            rows = cursor.fetchall()
         
-        return [dict(row) for row in rows]
+            return [dict(row) for row in rows]
         
     except Exception as e:
         log_error(f"Database query error: {e}")
@@ -145,17 +260,16 @@ def save_feedback_to_db(digest_date: str, feedback_type: str, rating: Optional[i
                        missed_signal: bool = False, db_path: str = "data/canary_protocol.db") -> bool:
     """Save user feedback to database"""
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO feedback (digest_date, feedback_type, rating, comments, 
-                                false_positive, missed_signal)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (digest_date, feedback_type, rating, comments, false_positive, missed_signal))
-        conn.commit()
-        conn.close()
-        log_info(f"Feedback saved for digest: {digest_date}")
-        return True
+        with _connection(db_path) as conn:
+            with conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO feedback (digest_date, feedback_type, rating, comments, 
+                                        false_positive, missed_signal)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (digest_date, feedback_type, rating, comments, false_positive, missed_signal))
+            log_info(f"Feedback saved for digest: {digest_date}")
+            return True
     except Exception as e:
         log_error(f"Feedback save error: {e}")
         return False
@@ -164,23 +278,22 @@ def save_feedback_to_db(digest_date: str, feedback_type: str, rating: Optional[i
 def get_learning_data(db_path: str = "data/canary_protocol.db") -> Dict[str, Dict[str, float]]:
     """Get learning data for adaptive intelligence"""
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        with _connection(db_path) as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
         
-        cursor.execute('SELECT * FROM learning_data')
-        rows = cursor.fetchall()
-        conn.close()
+            cursor.execute('SELECT * FROM learning_data')
+            rows = cursor.fetchall()
         
-        learning_data = {}
-        for row in rows:
-            learning_data[row['keyword']] = {
-                'urgency_weight': row['urgency_weight'],
-                'source_reliability': row['source_reliability'],
-                'feedback_score': row['feedback_score']
-            }
+            learning_data = {}
+            for row in rows:
+                learning_data[row['keyword']] = {
+                    'urgency_weight': row['urgency_weight'],
+                    'source_reliability': row['source_reliability'],
+                    'feedback_score': row['feedback_score']
+                }
         
-        return learning_data
+            return learning_data
         
     except Exception as e:
         log_error(f"Learning data query error: {e}")
@@ -191,19 +304,18 @@ def update_learning_data(keyword: str, urgency_weight: float, source_reliability
                         feedback_score: float, db_path: str = "data/canary_protocol.db") -> bool:
     """Update or insert learning data for a keyword"""
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        with _connection(db_path) as conn:
+            with conn:
+                cursor = conn.cursor()
         
-        # Use INSERT OR REPLACE to update existing or create new
-        cursor.execute('''
-            INSERT OR REPLACE INTO learning_data 
-            (keyword, urgency_weight, source_reliability, feedback_score, last_updated)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (keyword, urgency_weight, source_reliability, feedback_score, datetime.now()))
+                # Use INSERT OR REPLACE to update existing or create new
+                cursor.execute('''
+                    INSERT OR REPLACE INTO learning_data 
+                    (keyword, urgency_weight, source_reliability, feedback_score, last_updated)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (keyword, urgency_weight, source_reliability, feedback_score, datetime.now()))
         
-        conn.commit()
-        conn.close()
-        return True
+            return True
         
     except Exception as e:
         log_error(f"Learning data update error: {e}")
@@ -213,19 +325,18 @@ def update_learning_data(keyword: str, urgency_weight: float, source_reliability
 def get_database_stats(db_path: str = "data/canary_protocol.db") -> Dict[str, int]:
     """Get database statistics"""
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        with _connection(db_path) as conn:
+            cursor = conn.cursor()
         
-        stats = {}
+            stats = {}
         
-        # Count records in each table
-        tables = ['weekly_digests', 'feedback', 'learning_data', 'ab_tests']
-        for table in tables:
-            cursor.execute(f'SELECT COUNT(*) FROM {table}')
-            stats[table] = cursor.fetchone()[0]
+            # Count records in each table
+            tables = ['weekly_digests', 'feedback', 'learning_data', 'ab_tests']
+            for table in tables:
+                cursor.execute(f'SELECT COUNT(*) FROM {table}')
+                stats[table] = cursor.fetchone()[0]
         
-        conn.close()
-        return stats
+            return stats
         
     except Exception as e:
         log_error(f"Database stats error: {e}")
@@ -235,29 +346,28 @@ def get_database_stats(db_path: str = "data/canary_protocol.db") -> Dict[str, in
 def cleanup_old_data(days_to_keep: int = 90, db_path: str = "data/canary_protocol.db") -> bool:
     """Clean up old data beyond retention period"""
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        with _connection(db_path) as conn:
+            with conn:
+                cursor = conn.cursor()
         
-        cutoff_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                cutoff_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
-        # Clean up old digests
-        cursor.execute('''
-            DELETE FROM weekly_digests 
-            WHERE created_at < datetime('now', '-{} days')
-        '''.format(days_to_keep))
+                # Clean up old digests
+                cursor.execute('''
+                    DELETE FROM weekly_digests 
+                    WHERE created_at < datetime('now', '-{} days')
+                '''.format(days_to_keep))
         
-        # Clean up old feedback
-        cursor.execute('''
-            DELETE FROM feedback 
-            WHERE created_at < datetime('now', '-{} days')
-        '''.format(days_to_keep))
+                # Clean up old feedback
+                cursor.execute('''
+                    DELETE FROM feedback 
+                    WHERE created_at < datetime('now', '-{} days')
+                '''.format(days_to_keep))
         
-        conn.commit()
-        deleted_rows = cursor.rowcount
-        conn.close()
+            deleted_rows = cursor.rowcount
         
-        log_info(f"Cleaned up {deleted_rows} old database records")
-        return True
+            log_info(f"Cleaned up {deleted_rows} old database records")
+            return True
         
     except Exception as e:
         log_error(f"Database cleanup error: {e}")
@@ -267,27 +377,26 @@ def cleanup_old_data(days_to_keep: int = 90, db_path: str = "data/canary_protoco
 def get_feedback_summary(days: int = 7, db_path: str = "data/canary_protocol.db") -> Dict[str, Any]:
     """Get summary of user feedback over specified days"""
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        with _connection(db_path) as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
         
-        # Get feedback counts by type
-        cursor.execute('''
-            SELECT feedback_type, COUNT(*) as count, AVG(rating) as avg_rating
-            FROM feedback 
-            WHERE digest_date >= date('now', '-{} days')
-            GROUP BY feedback_type
-        '''.format(days))
+            # Get feedback counts by type
+            cursor.execute('''
+                SELECT feedback_type, COUNT(*) as count, AVG(rating) as avg_rating
+                FROM feedback 
+                WHERE digest_date >= date('now', '-{} days')
+                GROUP BY feedback_type
+            '''.format(days))
         
-        feedback_data = {}
-        for row in cursor.fetchall():
-            feedback_data[row['feedback_type']] = {
-                'count': row['count'],
-                'avg_rating': row['avg_rating'] if row['avg_rating'] else 0
-            }
+            feedback_data = {}
+            for row in cursor.fetchall():
+                feedback_data[row['feedback_type']] = {
+                    'count': row['count'],
+                    'avg_rating': row['avg_rating'] if row['avg_rating'] else 0
+                }
         
-        conn.close()
-        return feedback_data
+            return feedback_data
     except Exception as e:
         log_error(f"Error getting feedback summary: {e}")
         return {}
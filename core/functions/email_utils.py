@@ -6,7 +6,7 @@ Handles email formatting, sending, and template management
 
 import smtplib
 import markdown2
-import json
+from functools import lru_cache
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from datetime import datetime
@@ -17,20 +17,23 @@ except ImportError:
     from utils import log_error, load_file_lines
 
 
+# Shared renderer; convert() resets its state, so one instance serves every digest
+_MARKDOWN = markdown2.Markdown()
+
+# Most recipients handed to a single SMTP transaction; providers cap this
+# per message (Gmail at 100)
+EMAIL_BATCH_SIZE = 50
+
+
 def load_subscribers(filename: str = "config/subscribers.txt") -> List[str]:
     """Load email subscribers from file"""
     return load_file_lines(filename)
 
 
-def build_email_content(summary_text: str, top_links_html: str, 
+def build_email_content(summary_text: str, top_links: List[Dict[str, str]],
                        economic_data: Optional[List[Dict[str, Any]]] = None) -> str:
     """Build HTML email content from summary and links"""
     
-    try:
-        top_links = json.loads(top_links_html)
-    except Exception:
-        top_links = []
-
     # Add economic indicators to summary if available
     if economic_data:
         try:
@@ -40,7 +43,7 @@ def build_email_content(summary_text: str, top_links_html: str,
         except ImportError:
             pass
 
-    summary_html = markdown2.markdown(summary_text)
+    summary_html = _MARKDOWN.convert(summary_text)
     today = datetime.now().strftime("%B %d, %Y")
 
     # Build email components
@@ -81,20 +84,22 @@ def _build_legend_block() -> str:
     """
 
 
-def _build_links_block(links: List[Dict[str, str]]) -> str:
-    """Build top links block"""
-    links_html = ""
-    for link in links:
-        links_html += f"""
+# Markup for a single entry in the top links block
+LINK_BLOCK_FORMAT = """
         <div style='margin-bottom: 12px;'>
             <div style='font-size: 14px;'>
-                <a href='{link['url']}' target='_blank' style='color: #0066cc; text-decoration: none;'>
-                    {link['title']}
+                <a href='{url}' target='_blank' style='color: #0066cc; text-decoration: none;'>
+                    {title}
                 </a>
             </div>
         </div>
         """
-    return links_html
+
+
+def _build_links_block(links: List[Dict[str, str]]) -> str:
+    """Build top links block"""
+    return "".join(LINK_BLOCK_FORMAT.format(url=link['url'], title=link['title'])
+                   for link in links)
 
 
 def _build_footer_block() -> str:
@@ -106,8 +111,9 @@ def _build_footer_block() -> str:
     """
 
 
+@lru_cache(maxsize=1)
 def _load_email_template() -> str:
-    """Load email template from config directory"""
+    """Load email template from config directory (read once per process)"""
     template_path = "config/email_template.html"
     try:
         with open(template_path, "r") as f:
@@ -153,10 +159,13 @@ def send_email(subject: str, html_content: str, gmail_user: str, gmail_password:
         msg['To'] = ", ".join(subscribers)
         msg['Subject'] = subject
         msg.attach(MIMEText(html_content, 'html'))
+        message = msg.as_string()
 
+        # One login; large lists go out in batches over the same connection
         with smtplib.SMTP_SSL('smtp.gmail.com', 465) as server:
             server.login(gmail_user, gmail_password)
-            server.sendmail(gmail_user, subscribers, msg.as_string())
+            for start in range(0, len(subscribers), EMAIL_BATCH_SIZE):
+                server.sendmail(gmail_user, subscribers[start:start + EMAIL_BATCH_SIZE], message)
             print(f"✅ Email sent to {len(subscribers)} subscribers")
             return True
             
@@ -6,6 +6,7 @@ Handles Slack message formatting and sending
 
 import requests
 import re
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 from typing import List, Dict, Any
 try:
@@ -14,22 +15,36 @@ except ImportError:
     from utils import log_error
 
 
+# Slack rejects section text over 3000 characters; leave some headroom
+SLACK_SECTION_LIMIT = 2900
+
+# Shared session so repeated webhook posts reuse the pooled TLS connection
+_HTTP = requests.Session()
+_HTTP.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+# Markdown headers (# through ####) become bold Slack lines
+_SLACK_HEADER_RE = re.compile(r'^#{1,4} (.*)$', re.MULTILINE)
+
+# Bold markers, bullets and blank lines; a blank line directly before a
+# bullet is matched together so both rewrites apply in the one pass
+_SLACK_INLINE_RE = re.compile(r'\*\*|\n\n(?:- )?|\n- ')
+
+
+def _slack_inline_sub(match: re.Match) -> str:
+    """Replacement for a single _SLACK_INLINE_RE match"""
+    token = match.group(0)
+    if token == "**":
+        return "*"
+    return "\n• " if token.endswith("- ") else "\n"
+
+
 def format_slack_message(summary_text: str) -> str:
     """Format summary text for Slack markdown"""
-    slack_text = summary_text
-    
     # Convert markdown headers to Slack format
-    slack_text = re.sub(r'^#### (.*)$', r'*\1*', slack_text, flags=re.MULTILINE)
-    slack_text = re.sub(r'^### (.*)$', r'*\1*', slack_text, flags=re.MULTILINE)
-    slack_text = re.sub(r'^## (.*)$', r'*\1*', slack_text, flags=re.MULTILINE)
-    slack_text = re.sub(r'^# (.*)$', r'*\1*', slack_text, flags=re.MULTILINE)
+    slack_text = _SLACK_HEADER_RE.sub(r'*\1*', summary_text)
     
     # Convert bullet points and formatting
-    slack_text = slack_text.replace("\n- ", "\n• ")
-    slack_text = slack_text.replace("**", "*")
-    slack_text = slack_text.replace("\n\n", "\n")
-    
-    return slack_text
+    return _SLACK_INLINE_RE.sub(_slack_inline_sub, slack_text)
 
 
 def build_slack_blocks(summary_text: str) -> List[Dict[str, Any]]:
@@ -48,31 +63,45 @@ def build_slack_blocks(summary_text: str) -> List[Dict[str, Any]]:
     ]
 
     # Split content into chunks for Slack's message limits
-    chunk_size = 2900
-    current_chunk = ""
+    chunk_size = SLACK_SECTION_LIMIT
+    current_chunk: List[str] = []
+    current_len = 0
     
     for line in slack_text.splitlines():
-        # Start new section for headers
-        if line.startswith("*") and line.endswith("*") and current_chunk:
-            blocks.append({
-                "type": "section", 
-                "text": {"type": "mrkdwn", "text": current_chunk.strip()}
-            })
-            blocks.append({"type": "divider"})
-            current_chunk = line + "\n"
-        else:
-            current_chunk += line + "\n"
+        is_header = line.startswith("*") and line.endswith("*")
+        # Start new section for headers, or when the line would overflow the block
+        if current_chunk and (is_header or current_len + len(line) + 1 > chunk_size):
+            if _append_section(blocks, current_chunk) and is_header:
+                blocks.append({"type": "divider"})
+            current_chunk = []
+            current_len = 0
+
+        # A single line longer than a block is split across sections
+        while len(line) > chunk_size:
+            _append_section(blocks, [line[:chunk_size]])
+            line = line[chunk_size:]
+
+        current_chunk.append(line)
+        current_len += len(line) + 1
 
     # Add final chunk if it exists
-    if current_chunk.strip():
-        blocks.append({
-            "type": "section", 
-            "text": {"type": "mrkdwn", "text": current_chunk.strip()}
-        })
+    _append_section(blocks, current_chunk)
 
     return blocks
 
 
+def _append_section(blocks: List[Dict[str, Any]], lines: List[str]) -> bool:
+    """Append lines as a mrkdwn section block, skipping blank content"""
+    text = "\n".join(lines).strip()
+    if not text:
+        return False
+    blocks.append({
+        "type": "section", 
+        "text": {"type": "mrkdwn", "text": text}
+    })
+    return True
+
+
 def send_to_slack(summary_text: str, webhook_url: str, test_mode: bool = False) -> bool:
     """Send message to Slack webhook"""
     
@@ -88,7 +117,7 @@ def send_to_slack(summary_text: str, webhook_url: str, test_mode: bool = False)
         blocks = build_slack_blocks(summary_text)
         slack_payload = {"blocks": blocks}
 
-        response = requests.post(webhook_url, json=slack_payload)
+        response = _HTTP.post(webhook_url, json=slack_payload)
         if response.status_code != 200:
             log_error(f"Slack webhook error: {response.status_code} {response.text}")
             return False
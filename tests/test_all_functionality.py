@@ -144,7 +144,7 @@ def test_email_utilities():
         
         # Test email content building
         test_summary = "# Test Summary\nThis is a test."
-        test_links = '[{"title": "Test Link", "url": "https://example.com"}]'
+        test_links = [{"title": "Test Link", "url": "https://example.com"}]
         
         email_content = build_email_content(test_summary, test_links)
         if isinstance(email_content, str) and len(email_content) > 0:
@@ -124,7 +124,8 @@ class ComprehensiveTestSuite:
             'core.classes.public_social_monitor',
             'core.classes.x_monitor',
             'core.canary_protocol',
-            'core.canary_tui'
+            'core.canary_tui',
+            'core.ab_testing'
         ]
         
         failed_imports = []
@@ -272,6 +273,33 @@ class ComprehensiveTestSuite:
             
             return "Feedback system functional"
 
+    @time_test
+    def test_prediction_feedback(self):
+        """Test that feedback updates a prediction still held in the write buffer"""
+        with TestEnvironment() as env:
+            from core.classes.adaptive_intelligence import AdaptiveIntelligence
+            from core.classes.smart_feedback import FeedbackSystem
+
+            ai = AdaptiveIntelligence(env.test_db)
+            predicted, _ = ai.predict_trend_urgency(
+                [{'title': 'Markets steady ahead of earnings'}], [])
+            if not ai._pending_predictions:
+                raise Exception("Expected the prediction to be buffered")
+
+            feedback = FeedbackSystem(env.test_db)
+            feedback._update_intelligence_from_feedback(predicted, 8, "")
+
+            conn = sqlite3.connect(env.test_db)
+            row = conn.execute(
+                "SELECT predicted_urgency, actual_urgency FROM prediction_tracking").fetchone()
+            conn.close()
+            ai.close()
+
+            if row is None or row[1] != 8:
+                raise Exception(f"Prediction not updated by feedback: {row}")
+
+            return "Feedback updated buffered prediction"
+
     @time_test
     def test_daily_collector(self):
         """Test daily data collection"""
@@ -303,6 +331,70 @@ class ComprehensiveTestSuite:
             
             return f"Daily collection functional, emergency level: {emergency_level}"
 
+    @time_test
+    def test_feed_cache(self):
+        """Test that a cache miss stores feed entries and a 304 reuses them"""
+        with TestEnvironment() as env:
+            import feedparser
+            import core.canary_protocol as cp
+
+            feed_url = "https://example.com/rss.xml"
+            calls = []
+
+            def fake_parse(url, etag=None, modified=None):
+                calls.append(etag)
+                feed = feedparser.FeedParserDict(status=200, etag='"v1"', entries=[])
+                if etag == '"v1"':
+                    feed['status'] = 304
+                    return feed
+                feed['entries'] = [feedparser.FeedParserDict(title=f"Headline {i}", link=f"https://example.com/{i}")
+                                   for i in range(5)]
+                return feed
+
+            ttl_minutes = [60]
+            settings = {
+                'monitoring.news_sources': [feed_url],
+                'monitoring.feed_cache_ttl_minutes': lambda: ttl_minutes[0],
+            }
+
+            def fake_setting(key, default=None):
+                value = settings.get(key, default)
+                return value() if callable(value) else value
+
+            cp.init_db(env.test_db)
+            get_cached_feeds, save_feed_cache = cp.get_cached_feeds, cp.save_feed_cache
+            # cp imports database_utils under its own module name
+            close_connections = sys.modules[get_cached_feeds.__module__].close_connections
+            try:
+                with patch.object(cp.feedparser, 'parse', fake_parse), \
+                     patch.object(cp, 'get_setting', fake_setting, create=True), \
+                     patch.object(cp, 'CONFIG_ENABLED', True), \
+                     patch.object(cp, 'get_cached_feeds', lambda urls: get_cached_feeds(urls, env.test_db)), \
+                     patch.object(cp, 'save_feed_cache', lambda feeds: save_feed_cache(feeds, env.test_db)):
+                    # Cache miss: unconditional fetch, entries written to feed_cache
+                    first = cp.fetch_news()
+                    if calls != [None] or len(first) != 3:
+                        raise Exception(f"Unexpected cache-miss fetch: calls={calls}, headlines={len(first)}")
+                    cached = get_cached_feeds([feed_url], env.test_db).get(feed_url)
+                    if not cached or cached['etag'] != '"v1"' or cached['entries'] != first:
+                        raise Exception(f"Cache miss did not store the feed: {cached}")
+
+                    # Within the TTL the feed is not fetched at all
+                    if cp.fetch_news() != first or len(calls) != 1:
+                        raise Exception("Fresh cache entry was not served without fetching")
+
+                    # Expired entry: conditional GET, 304 reuses the cached entries
+                    ttl_minutes[0] = 0
+                    second = cp.fetch_news()
+                    if calls[-1] != '"v1"':
+                        raise Exception(f"Expired entry fetched without its ETag: {calls}")
+                    if second != first:
+                        raise Exception(f"304 response did not reuse cached entries: {second}")
+            finally:
+                close_connections()
+
+            return "Feed cache miss and 304 reuse verified"
+
     @time_test
     def test_configuration_system(self):
         """Test configuration loading and management"""
@@ -335,6 +427,30 @@ class ComprehensiveTestSuite:
             
             return "Configuration system functional"
 
+    @time_test
+    def test_slack_chunking(self):
+        """Test that an oversized digest is split into Slack sections without losing text"""
+        from core.functions.slack_utils import build_slack_blocks, format_slack_message, SLACK_SECTION_LIMIT
+
+        digest = "\n".join(
+            [f"## Section {n}\n" + "\n".join(f"- **Item {n}.{i}** " + "detail " * 15 for i in range(40))
+             for n in range(3)]
+            + ["Long line " + "x" * (SLACK_SECTION_LIMIT * 2 + 100)])
+
+        sections = [block["text"]["text"] for block in build_slack_blocks(digest)
+                    if block["type"] == "section"]
+        oversized = [len(text) for text in sections if len(text) > SLACK_SECTION_LIMIT]
+        if oversized:
+            raise Exception(f"Sections over the {SLACK_SECTION_LIMIT} character limit: {oversized}")
+
+        # Chunking may only drop whitespace; the first section is the title
+        expected = "".join(format_slack_message(digest).split())
+        actual = "".join("".join(sections[1:]).split())
+        if actual != expected:
+            raise Exception(f"Chunked text differs from the digest ({len(actual)} vs {len(expected)} characters)")
+
+        return f"Digest split into {len(sections) - 1} sections within the limit"
+
     @time_test
     def test_shell_scripts(self):
         """Test shell script execution"""
@@ -397,6 +513,48 @@ class ComprehensiveTestSuite:
             
             return "Integration workflow successful"
 
+    @time_test
+    def test_ab_testing_evaluation(self):
+        """Test single-pass A/B response evaluation against plain substring counts"""
+        from core.ab_testing import (
+            ABTestRunner, REQUIRED_SECTIONS, PROBLEMATIC_TERMS, STRUCTURED_SECTIONS)
+
+        response_text = (
+            "POLITICAL & INSTITUTIONAL 🟢 Fed raised rates 0.25% to $5,000 "
+            "per **[Reuters](https://example.com/a)** and **[AP](https://example.com/b)**. "
+            "ECONOMIC STABILITY 🟠 Chaos in markets, no collapse; CHAOS again. "
+            "KEY TAKEAWAYS 🔴🔴 KEY TAKEAWAYS 1,200 jobs in 3 states"
+        )
+
+        evaluation = ABTestRunner().evaluate_response(response_text, {})
+        lowered = response_text.lower()
+        expected = {
+            "sections_found": sum(1 for s in REQUIRED_SECTIONS if s in response_text),
+            "link_count": (response_text.count("**[") + response_text.count("](")) // 2,
+            "status_symbols": sum(response_text.count(c) for c in "🟢🟠🔴"),
+        }
+        problematic = sum(1 for term in PROBLEMATIC_TERMS if term in lowered)
+        term_counts = {term: lowered.count(term) for term in PROBLEMATIC_TERMS if term in lowered}
+
+        for key, value in expected.items():
+            if evaluation[key] != value:
+                raise Exception(f"{key}: expected {value}, got {evaluation[key]}")
+        if f"Found {problematic} problematic terms" not in " ".join(evaluation["feedback"]):
+            raise Exception(f"Expected {problematic} problematic terms: {evaluation['feedback']}")
+        if evaluation["problematic_terms"] != term_counts:
+            raise Exception(f"problematic_terms: expected {term_counts}, got {evaluation['problematic_terms']}")
+
+        # Structured mode reads the same metrics off a JSON briefing
+        briefing = {key: {"status": "🟢", "body": "Rates rose 0.25%"} for key in STRUCTURED_SECTIONS}
+        briefing["key_takeaways"] = ["Stay informed"]
+        briefing["sources"] = [{"title": "Reuters", "url": "https://example.com/a"}]
+        structured = ABTestRunner(structured=True).evaluate_response(json.dumps(briefing), {})
+        if (structured["sections_found"], structured["status_symbols"], structured["link_count"]) != (
+                len(REQUIRED_SECTIONS), len(STRUCTURED_SECTIONS), 1):
+            raise Exception(f"Structured evaluation mismatch: {structured}")
+
+        return f"A/B evaluation consistent, score {evaluation['score']}"
+
     def run_all_tests(self):
         """Execute all tests"""
         print("🧪 COMPREHENSIVE CANARY PROTOCOL TEST SUITE")
@@ -418,9 +576,17 @@ class ComprehensiveTestSuite:
             ("🧠 Learning System Tests", [
                 ("Adaptive Intelligence", self.test_adaptive_intelligence),
                 ("Feedback System", self.test_feedback_system),
+                ("Prediction Feedback", self.test_prediction_feedback),
             ]),
             ("📊 Data Collection Tests", [
                 ("Daily Collector", self.test_daily_collector),
+                ("Feed Cache", self.test_feed_cache),
+            ]),
+            ("📤 Delivery Tests", [
+                ("Slack Message Chunking", self.test_slack_chunking),
+            ]),
+            ("🧪 Prompt Testing", [
+                ("A/B Response Evaluation", self.test_ab_testing_evaluation),
             ]),
             ("🔗 Integration Tests", [
                 ("Shell Scripts", self.test_shell_scripts),